@@ -0,0 +1,308 @@
+# aes_pipeline.py
+#
+# Пакетное расшифрование AES-CBC. Для каждого ключа один раз строится
+# контекст OpenSSL в режиме ECB (отдельный на поток) и переиспользуется
+# для всех сообщений: расшифрование CBC — это расшифрование блоков ECB и
+# XOR с предыдущим блоком шифртекста (для первого блока — с IV). Пакет
+# сообщений расшифровывается через update_into в один bytearray, XOR
+# выполняется одной операцией numpy на весь пакет, а дополнение PKCS7
+# снимается срезом memoryview без копирования. OpenSSL отпускает GIL,
+# поэтому пакеты можно расшифровывать в пуле потоков.
+#
+# Файл с кадрами: заголовок FILE_HEADER, затем кадры FRAME_HEADER
+# (индекс ключа, длина шифртекста, IV), за каждым — шифртекст.
+#
+# Примеры:
+#     python aes_pipeline.py encrypt --key 00112233445566778899aabbccddeeff --in data.bin --out frames.bin
+#     python aes_pipeline.py decrypt --key 00112233445566778899aabbccddeeff --in frames.bin --out data.bin --workers 4
+
+import argparse
+import hmac
+import os
+import struct
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from instrumentation import add_bytes, add_profile_arguments, instrumented, profiling
+
+# Размер блока AES в байтах
+BLOCK_SIZE = 16
+
+# Сообщения объединяются в пакеты примерно такого суммарного размера (в байтах)
+BATCH_BYTES = 1 << 20
+
+# Наибольшее количество контекстов ECB, хранимых одним потоком
+CONTEXT_CACHE_SIZE = 64
+
+# Размер открытого текста одной записи при шифровании файла (в байтах)
+DEFAULT_RECORD_SIZE = 1 << 16
+
+# Заголовок файла: сигнатура и версия формата
+FILE_MAGIC = b'AESF'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sI')
+
+# Заголовок кадра: индекс ключа, длина шифртекста, IV
+FRAME_HEADER = struct.Struct(f'<BI{BLOCK_SIZE}s')
+
+# Контексты ECB и рабочий буфер текущего потока
+_thread_state = threading.local()
+
+@lru_cache(maxsize=64)
+def aes_algorithm(key):
+    """
+    Объект алгоритма AES для ключа. Строится один раз для каждого ключа.
+
+    :param key: Ключ (16, 24 или 32 байта).
+    :return: algorithms.AES.
+    """
+    return algorithms.AES(key)
+
+def _ecb_decryptor(key):
+    """Контекст расшифрования ECB для ключа, свой для каждого потока."""
+    contexts = getattr(_thread_state, 'contexts', None)
+    if contexts is None:
+        contexts = _thread_state.contexts = {}
+    decryptor = contexts.get(key)
+    if decryptor is None:
+        if len(contexts) >= CONTEXT_CACHE_SIZE:
+            contexts.clear()
+        decryptor = contexts[key] = Cipher(aes_algorithm(key), modes.ECB()).decryptor()
+    return decryptor
+
+def _scratch(size):
+    """Рабочий буфер текущего потока не меньше size байт."""
+    scratch = getattr(_thread_state, 'scratch', None)
+    if scratch is None or len(scratch) < size:
+        scratch = _thread_state.scratch = bytearray(max(size, BATCH_BYTES))
+    return scratch
+
+def unpad(view):
+    """
+    Снимает дополнение PKCS7 без копирования.
+
+    :param view: memoryview расшифрованных данных.
+    :return: memoryview открытого текста (срез view).
+    """
+    if not view or len(view) % BLOCK_SIZE:
+        raise ValueError("Длина данных не кратна размеру блока AES.")
+    pad = view[-1]
+    if not 1 <= pad <= BLOCK_SIZE or not hmac.compare_digest(view[-pad:], bytes((pad,)) * pad):
+        raise ValueError("Неверное дополнение PKCS7.")
+    return view[:-pad]
+
+def pad(data):
+    """Дополняет данные по PKCS7 до длины, кратной размеру блока AES."""
+    size = BLOCK_SIZE - len(data) % BLOCK_SIZE
+    return bytes(data) + bytes((size,)) * size
+
+@instrumented()
+def decrypt_batch_into(batch, buffer=None):
+    """
+    Расшифровывает пакет сообщений AES-CBC в один буфер.
+
+    :param batch: Список записей (key, iv, ciphertext); key — bytes.
+    :param buffer: bytearray длиной не меньше суммы длин шифртекстов + 15;
+                   по умолчанию выделяется новый.
+    :return: Список memoryview открытых текстов внутри buffer.
+    """
+    total = 0
+    for _, iv, ciphertext in batch:
+        if not ciphertext or len(ciphertext) % BLOCK_SIZE:
+            raise ValueError("Длина шифртекста не кратна размеру блока AES.")
+        if len(iv) != BLOCK_SIZE:
+            raise ValueError(f"IV должен иметь длину {BLOCK_SIZE} байт.")
+        total += len(ciphertext)
+    add_bytes(total)
+    if buffer is None:
+        buffer = bytearray(total + BLOCK_SIZE - 1)
+    elif len(buffer) < total + BLOCK_SIZE - 1:
+        raise ValueError("Буфер слишком мал для пакета.")
+    output = memoryview(buffer)
+    # previous — блоки, с которыми выполняется XOR: IV и шифртекст со сдвигом на блок
+    previous = memoryview(_scratch(total))
+    offset = 0
+    for key, iv, ciphertext in batch:
+        size = len(ciphertext)
+        _ecb_decryptor(key).update_into(ciphertext, output[offset:offset + size + BLOCK_SIZE - 1])
+        previous[offset:offset + BLOCK_SIZE] = iv
+        previous[offset + BLOCK_SIZE:offset + size] = memoryview(ciphertext)[:size - BLOCK_SIZE]
+        offset += size
+    words = np.frombuffer(buffer, dtype=np.uint64, count=total // 8)
+    np.bitwise_xor(words, np.frombuffer(previous.obj, dtype=np.uint64, count=total // 8), out=words)
+
+    views = []
+    offset = 0
+    for _, _, ciphertext in batch:
+        views.append(unpad(output[offset:offset + len(ciphertext)]))
+        offset += len(ciphertext)
+    return views
+
+def decrypt_cbc(key, iv, ciphertext):
+    """
+    Расшифровывает одно сообщение AES-CBC и снимает дополнение PKCS7.
+
+    :param key: Ключ.
+    :param iv: Вектор инициализации (16 байт).
+    :param ciphertext: Шифртекст.
+    :return: Открытый текст (bytes).
+    """
+    return decrypt_batch_into([(bytes(key), iv, ciphertext)])[0].tobytes()
+
+def encrypt_cbc(key, iv, plaintext):
+    """
+    Шифрует сообщение AES-CBC с дополнением PKCS7.
+
+    :param key: Ключ.
+    :param iv: Вектор инициализации (16 байт).
+    :param plaintext: Открытый текст.
+    :return: Шифртекст (bytes).
+    """
+    encryptor = Cipher(aes_algorithm(bytes(key)), modes.CBC(iv)).encryptor()
+    return encryptor.update(pad(plaintext)) + encryptor.finalize()
+
+def _batches(records, batch_bytes):
+    """Группирует записи в пакеты суммарным размером около batch_bytes."""
+    batch, size = [], 0
+    for key, iv, ciphertext in records:
+        batch.append((bytes(key), iv, ciphertext))
+        size += len(ciphertext)
+        if size >= batch_bytes:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+def decrypt_records(records, workers=1, batch_bytes=BATCH_BYTES):
+    """
+    Расшифровывает поток записей AES-CBC в исходном порядке.
+
+    :param records: Итерируемый набор (key, iv, ciphertext).
+    :param workers: Количество потоков; при workers > 1 пакеты
+                    расшифровываются в пуле потоков (не больше 2 * workers
+                    пакетов одновременно).
+    :param batch_bytes: Примерный суммарный размер шифртекстов в пакете.
+    :return: Генератор memoryview открытых текстов. Каждый пакет
+             расшифровывается в собственный буфер, поэтому представления
+             остаются действительными и после следующих итераций.
+    """
+    batches = _batches(records, batch_bytes)
+    if workers <= 1:
+        for batch in batches:
+            yield from decrypt_batch_into(batch)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(decrypt_batch_into, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def write_frames(stream, frames):
+    """
+    Записывает файл с кадрами.
+
+    :param stream: Двоичный поток.
+    :param frames: Итерируемый набор (индекс ключа, iv, ciphertext).
+    """
+    stream.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+    for key_index, iv, ciphertext in frames:
+        stream.write(FRAME_HEADER.pack(key_index, len(ciphertext), bytes(iv)))
+        stream.write(ciphertext)
+
+def read_frames(stream, keys):
+    """
+    Читает файл с кадрами.
+
+    :param stream: Двоичный поток.
+    :param keys: Список ключей; кадр ссылается на ключ по индексу.
+    :return: Генератор записей (key, iv, ciphertext).
+    """
+    header = stream.read(FILE_HEADER.size)
+    if len(header) != FILE_HEADER.size or FILE_HEADER.unpack(header) != (FILE_MAGIC, FILE_VERSION):
+        raise ValueError("Файл не является файлом кадров AES.")
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if not header:
+            return
+        if len(header) != FRAME_HEADER.size:
+            raise ValueError("Файл кадров поврежден: неполный заголовок кадра.")
+        key_index, size, iv = FRAME_HEADER.unpack(header)
+        if key_index >= len(keys):
+            raise ValueError(f"Кадр ссылается на неизвестный ключ {key_index}.")
+        ciphertext = stream.read(size)
+        if len(ciphertext) != size:
+            raise ValueError("Файл кадров поврежден: шифртекст обрывается.")
+        yield keys[key_index], iv, ciphertext
+
+@instrumented()
+def encrypt_file(source, target, key, record_size=DEFAULT_RECORD_SIZE):
+    """
+    Шифрует двоичный поток записями по record_size байт со случайными IV
+    и записывает их в файл с кадрами.
+
+    :param source: Двоичный поток открытого текста.
+    :param target: Двоичный поток файла кадров.
+    :param key: Ключ (индекс 0).
+    :param record_size: Размер открытого текста записи.
+    """
+    def frames():
+        while True:
+            chunk = source.read(record_size)
+            if not chunk:
+                break
+            iv = os.urandom(BLOCK_SIZE)
+            yield 0, iv, encrypt_cbc(key, iv, chunk)
+    write_frames(target, frames())
+
+@instrumented()
+def decrypt_file(source, target, keys, workers=1):
+    """
+    Расшифровывает файл с кадрами и записывает открытые тексты подряд.
+
+    :param source: Двоичный поток файла кадров.
+    :param target: Двоичный поток для открытого текста.
+    :param keys: Список ключей.
+    :param workers: Количество потоков.
+    """
+    for plaintext in decrypt_records(read_frames(source, keys), workers):
+        target.write(plaintext)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетное шифрование и расшифрование AES-CBC")
+    parser.add_argument('action', choices=['encrypt', 'decrypt'])
+    parser.add_argument('--key', action='append', required=True,
+                        help="Ключ в шестнадцатеричном виде (для decrypt можно несколько, по порядку индексов)")
+    parser.add_argument('--in', dest='input', help="Входной файл (по умолчанию stdin)")
+    parser.add_argument('--out', dest='output', help="Выходной файл (по умолчанию stdout)")
+    parser.add_argument('--record-size', type=int, default=DEFAULT_RECORD_SIZE,
+                        help="Размер записи при шифровании (в байтах)")
+    parser.add_argument('--workers', type=int, default=1, help="Количество потоков расшифрования")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    keys = [bytes.fromhex(key) for key in args.key]
+    source = open(args.input, 'rb') if args.input else sys.stdin.buffer
+    target = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        with profiling(args.profile, args.profile_allocations):
+            if args.action == 'encrypt':
+                encrypt_file(source, target, keys[0], args.record_size)
+            else:
+                decrypt_file(source, target, keys, args.workers)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            target.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,17 @@
 # affine_cipher.py
 
+from functools import lru_cache
+
+import numpy as np
+
+from alphabet import LATIN, as_alphabet
+from frequencies import LANGUAGE_FREQUENCIES
+from instrumentation import instrumented
+from monoalphabetic import affine_inverse_table, affine_table, translate
+
+# Количество букв начала текста, по которым ранжируются ключи в режиме выборки
+CRACK_SAMPLE_SIZE = 2048
+
 def gcd(a, b):
     while b != 0:
         a, b = b, a % b
@@ -9,63 +21,159 @@ def mod_inverse(a, m):
     """
     Находит мультипликативный обратный элемент для a по модулю m.
     """
-    a = a % m
-    for x in range(1, m):
-        if (a * x) % m == 1:
-            return x
-    raise ValueError(f"Обратный элемент для a={a} по модулю m={m} не существует.")
+    try:
+        return pow(a, -1, m)
+    except ValueError:
+        raise ValueError(f"Обратный элемент для a={a} по модулю m={m} не существует.") from None
 
-def affine_encrypt(plaintext, a, b):
+@lru_cache(maxsize=None)
+def affine_keys(m=len(LATIN)):
+    """
+    Все ключи аффинного шифра по модулю m: допустимые a (взаимно простые
+    с m) вместе с обратными элементами и все сдвиги b. Для m = 26 —
+    12 значений a и 312 ключей.
+
+    :param m: Размер алфавита.
+    :return: Тройка массивов (a, a_inv, b) длины len(a) * m, упорядоченных по a, затем по b.
+    """
+    valid = [a for a in range(1, m) if gcd(a, m) == 1]
+    a = np.repeat(np.array(valid, dtype=np.int64), m)
+    a_inv = np.repeat(np.array([mod_inverse(x, m) for x in valid], dtype=np.int64), m)
+    b = np.tile(np.arange(m, dtype=np.int64), len(valid))
+    return a, a_inv, b
+
+def _chi_squared(counts, total, reference):
+    """
+    Статистика хи-квадрат строк матрицы частот относительно эталонного
+    распределения букв.
+    """
+    expected = total * np.asarray(reference)
+    return (((counts - expected) ** 2) / expected).sum(axis=1)
+
+@instrumented(size_arg=0)
+def affine_encrypt(plaintext, a, b, alphabet=LATIN):
     """
     Шифрует текст аффинным шифром.
     
     :param plaintext: Открытый текст.
     :param a: Коэффициент a (должен быть взаимно простым с m).
     :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
     :return: Зашифрованный текст.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
     m = len(alphabet)
     if gcd(a, m) != 1:
         raise ValueError(f"Коэффициент a={a} не взаимно прост с m={m}.")
-    
-    encrypted = ''
-    for char in plaintext.lower():
-        if char in alphabet:
-            x = alphabet.index(char)
-            encrypted += alphabet[(a * x + b) % m]
-        else:
-            encrypted += char  # Не изменяем символы вне алфавита
 
-    return encrypted
+    return translate(plaintext, affine_table(a, b, alphabet))
 
-def affine_decrypt(ciphertext, a, b):
+@instrumented(size_arg=0)
+def affine_decrypt(ciphertext, a, b, alphabet=LATIN):
     """
     Расшифровывает текст аффинным шифром.
     
     :param ciphertext: Зашифрованный текст.
     :param a: Коэффициент a.
     :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
     :return: Расшифрованный текст.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    # Обратимость a по модулю m проверяется при построении таблицы
+    return translate(ciphertext, affine_inverse_table(a, b, alphabet))
+
+def affine_encrypt_stream(chunks, a, b, alphabet=LATIN):
+    """
+    Потоково шифрует текст аффинным шифром.
+
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param a: Коэффициент a (должен быть взаимно простым с m).
+    :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    for chunk in chunks:
+        yield affine_encrypt(chunk, a, b, alphabet)
+
+def affine_decrypt_stream(chunks, a, b, alphabet=LATIN):
+    """
+    Потоково расшифровывает текст аффинным шифром.
+
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param a: Коэффициент a.
+    :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    for chunk in chunks:
+        yield affine_decrypt(chunk, a, b, alphabet)
+
+@instrumented(size_arg=0)
+def affine_crack(ciphertext, top=5, sample_size=None, alphabet=LATIN, reference=None):
+    """
+    Перебирает все ключи аффинного шифра. Выборка шифртекста расшифровывается
+    всеми ключами сразу как матрица (ключи x буквы) по формуле
+    a_inv * (y - b) mod m, ключи ранжируются по хи-квадрат относительно
+    частот языка.
+
+    В режиме выборки (sample_size) матрица строится только по началу
+    текста; лучшие кандидаты затем проверяются на всем тексте по его
+    гистограмме, которая для каждого ключа лишь переставляется.
+
+    :param ciphertext: Зашифрованный текст.
+    :param top: Количество возвращаемых кандидатов.
+    :param sample_size: Количество букв начала текста для ранжирования
+                        (None — весь текст, если он не длиннее CRACK_SAMPLE_SIZE
+                        букв, иначе CRACK_SAMPLE_SIZE).
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :param reference: Частоты букв открытого текста (по умолчанию — из
+                      LANGUAGE_FREQUENCIES для алфавита).
+    :return: Список четверок (a, b, хи-квадрат, открытый текст) по
+             возрастанию хи-квадрат.
+    """
+    alphabet = as_alphabet(alphabet)
+    if reference is None:
+        if alphabet not in LANGUAGE_FREQUENCIES:
+            raise ValueError(f"Нет эталонных частот для алфавита {alphabet}.")
+        reference = LANGUAGE_FREQUENCIES[alphabet]
     m = len(alphabet)
-    a_inv = mod_inverse(a, m)
-    
-    decrypted = ''
-    for char in ciphertext.lower():
-        if char in alphabet:
-            y = alphabet.index(char)
-            decrypted += alphabet[(a_inv * (y - b)) % m]
-        else:
-            decrypted += char  # Не изменяем символы вне алфавита
+    y = alphabet.encode(ciphertext).astype(np.int64)
+    if not len(y):
+        raise ValueError("Шифртекст не содержит букв алфавита.")
+    a, a_inv, b = affine_keys(m)
+    sample = y[:sample_size or CRACK_SAMPLE_SIZE]
+
+    plain = (a_inv[:, None] * (sample - b[:, None])) % m
+    offsets = np.arange(len(a))[:, None] * m
+    counts = np.bincount((plain + offsets).ravel(), minlength=len(a) * m).reshape(len(a), m)
+    order = np.argsort(_chi_squared(counts, len(sample), reference), kind='stable')
+
+    if len(sample) < len(y):
+        # Подтверждение на всем тексте: буква y переходит в a_inv * (y - b),
+        # поэтому гистограмма открытого текста — перестановка гистограммы шифртекста
+        candidates = order[:max(top, 1) * 4]
+        histogram = np.bincount(y, minlength=m)
+        letters = np.arange(m)
+        mapped = (a_inv[candidates, None] * (letters - b[candidates, None])) % m
+        counts = np.zeros((len(candidates), m), dtype=np.int64)
+        np.put_along_axis(counts, mapped, histogram[None, :], axis=1)
+        chi = _chi_squared(counts, len(y), reference)
+        ranked = candidates[np.argsort(chi, kind='stable')]
+        chi = np.sort(chi, kind='stable')
+    else:
+        ranked = order
+        chi = _chi_squared(counts, len(sample), reference)[order]
 
-    return decrypted
+    return [(int(a[key]), int(b[key]), float(score), affine_decrypt(ciphertext, int(a[key]), int(b[key]), alphabet))
+            for key, score in zip(ranked[:top], chi[:top])]
 
 def main():
     print("Аффинный шифр")
-    choice = input("Выберите действие (encrypt/decrypt): ").strip().lower()
+    choice = input("Выберите действие (encrypt/decrypt/crack): ").strip().lower()
     text = input("Введите текст: ")
+    if choice == 'crack':
+        for a, b, score, result in affine_crack(text):
+            print(f"a={a}, b={b}, хи-квадрат: {score:.1f}, текст: {result}")
+        return
     a = int(input("Введите коэффициент a (взаимно простой с 26): "))
     b = int(input("Введите коэффициент b: "))
 
@@ -82,7 +190,7 @@ def main():
         except ValueError as e:
             print(e)
     else:
-        print("Неверный выбор. Пожалуйста, выберите 'encrypt' или 'decrypt'.")
+        print("Неверный выбор. Пожалуйста, выберите 'encrypt', 'decrypt' или 'crack'.")
 
 if __name__ == "__main__":
     main()
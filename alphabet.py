@@ -0,0 +1,159 @@
+# alphabet.py
+#
+# Алфавиты шифров. Alphabet хранит заранее построенные таблицы
+# перевода символов в индексы (numpy uint8) и обратно, поэтому шифрам не
+# нужно строить словари letter_to_index при каждом вызове. Экземпляры
+# интернируются: Alphabet с теми же буквами и заменами строится один раз
+# на процесс и разделяется всеми модулями.
+
+import threading
+
+import numpy as np
+
+# Индекс, которым помечаются символы вне алфавита
+NON_LETTER = 255
+
+class Alphabet:
+    """
+    Упорядоченный набор строчных букв. Заглавные буквы получают тот же
+    индекс, что и строчные; aliases задает буквы, которые заменяются
+    буквами алфавита (например, {'j': 'i'} для шифра Плейфера).
+    """
+
+    _interned = {}
+    _lock = threading.Lock()
+
+    def __new__(cls, letters, aliases=None):
+        letters = letters.lower()
+        aliases = tuple(sorted((aliases or {}).items()))
+        key = (letters, aliases)
+        with cls._lock:
+            instance = cls._interned.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._build(letters, dict(aliases))
+                cls._interned[key] = instance
+        return instance
+
+    def _build(self, letters, aliases):
+        if not letters or len(set(letters)) != len(letters):
+            raise ValueError("Алфавит должен состоять из неповторяющихся букв.")
+        if len(letters) >= NON_LETTER:
+            raise ValueError(f"Алфавит не может содержать больше {NON_LETTER - 1} букв.")
+        if any(target not in letters for target in aliases.values()):
+            raise ValueError("Замены должны указывать на буквы алфавита.")
+        self.letters = letters
+        self.size = len(letters)
+        self.aliases = aliases
+
+        self.index = {}
+        for idx, char in enumerate(letters):
+            self.index[char] = self.index[char.upper()] = idx
+        for source, target in aliases.items():
+            self.index[source] = self.index[source.upper()] = self.index[target]
+
+        # Таблица кодов Unicode -> индекс; последний элемент всегда равен
+        # NON_LETTER и используется для всех кодов за пределами таблицы
+        self.lookup = np.full(max(map(ord, self.index)) + 2, NON_LETTER, dtype=np.uint8)
+        for char, idx in self.index.items():
+            self.lookup[ord(char)] = idx
+        self.codes = np.array([ord(char) for char in letters], dtype=np.uint32)
+        self.upper_codes = np.array([ord(char.upper()) for char in letters], dtype=np.uint32)
+        self.alias_table = str.maketrans({**aliases, **{s.upper(): t.upper() for s, t in aliases.items()}})
+
+    def __reduce__(self):
+        # При передаче в другой процесс экземпляр интернируется заново
+        return Alphabet, (self.letters, self.aliases)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.letters)
+
+    def __getitem__(self, idx):
+        return self.letters[idx]
+
+    def __contains__(self, char):
+        return char in self.index
+
+    def __str__(self):
+        return self.letters
+
+    def __repr__(self):
+        return f"Alphabet({self.letters!r})"
+
+    def normalize(self, text):
+        """
+        Приводит текст к нижнему регистру и применяет замены букв.
+        """
+        return text.translate(self.alias_table).lower() if self.aliases else text.lower()
+
+    def _code_points(self, text):
+        return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+    def encode(self, text, passthrough=False):
+        """
+        Переводит текст в массив индексов алфавита (numpy uint8) за один
+        векторный проход. Регистр не учитывается.
+
+        :param text: Строка.
+        :param passthrough: Сохранять символы вне алфавита как NON_LETTER
+                            (длина результата равна длине текста); иначе
+                            они отбрасываются.
+        :return: Массив индексов.
+        """
+        return self.encode_codes(self._code_points(text), passthrough)
+
+    def encode_codes(self, codes, passthrough=False):
+        """
+        То же, что encode, для массива кодов Unicode.
+        """
+        indices = self.lookup[np.minimum(codes, len(self.lookup) - 1)]
+        return indices if passthrough else indices[indices != NON_LETTER]
+
+    def decode(self, indices):
+        """
+        Переводит массив индексов алфавита обратно в строку (строчными буквами).
+        """
+        return self.codes[np.asarray(indices)].tobytes().decode('utf-32-le')
+
+    def case_mask(self, text):
+        """
+        Маска заглавных букв текста: True там, где стоит заглавная буква
+        алфавита. Длина маски равна длине текста.
+        """
+        codes = self._code_points(text)
+        indices = self.encode_codes(codes, passthrough=True)
+        letters = indices != NON_LETTER
+        upper = np.zeros(len(codes), dtype=bool)
+        upper[letters] = codes[letters] == self.upper_codes[indices[letters]]
+        return upper
+
+    def apply_case(self, text, mask):
+        """
+        Переводит в верхний регистр буквы текста, отмеченные маской
+        case_mask (текст той же длины).
+        """
+        codes = self._code_points(text)
+        indices = self.encode_codes(codes, passthrough=True)
+        upper = np.asarray(mask) & (indices != NON_LETTER)
+        if not upper.any():
+            return text
+        codes = codes.copy()
+        codes[upper] = self.upper_codes[indices[upper]]
+        return codes.tobytes().decode('utf-32-le')
+
+def as_alphabet(alphabet):
+    """
+    Принимает Alphabet или строку букв и возвращает интернированный Alphabet.
+    """
+    return alphabet if isinstance(alphabet, Alphabet) else Alphabet(alphabet)
+
+LATIN = Alphabet('abcdefghijklmnopqrstuvwxyz')
+
+# Русский алфавит с буквой 'ё'
+RUSSIAN = Alphabet('абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
+
+# Алфавит шифра Плейфера: 'j' объединяется с 'i'
+PLAYFAIR = Alphabet('abcdefghiklmnopqrstuvwxyz', {'j': 'i'})
@@ -0,0 +1,133 @@
+# benchmarks/primes.py
+#
+# Проверка на простоту и поиск следующего простого: прежние реализации
+# (перебор делителей 6k±1 из shamire.py, тест Миллера — Рабина из
+# Cryptography.ipynb с log2(n) случайными раундами) против primes.py.
+# Запуск из корня репозитория:
+#
+#     python -m benchmarks.primes [--bits 16 32 64 128 256 512 1024] [--count 200]
+#
+# Вторая таблица сравнивает проверку массивов is_prime_many с поэлементным
+# вызовом is_prime.
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+from primes import is_prime, is_prime_many, next_prime
+
+# Перебор делителей выполняется только для чисел не длиннее этого числа бит
+TRIAL_DIVISION_MAX_BITS = 40
+
+def trial_division_is_prime(n):
+    """Перебор делителей вида 6k±1 (прежняя реализация shamire.py)."""
+    if n <= 1:
+        return False
+    if n <= 3:
+        return True
+    if n % 2 == 0 or n % 3 == 0:
+        return False
+    i = 5
+    w = 2
+    while i * i <= n:
+        if n % i == 0:
+            return False
+        i += w
+        w = 6 - w
+    return True
+
+def notebook_miller_rabin(n):
+    """Тест Миллера — Рабина с log2(n) случайными раундами (прежняя реализация из блокнота)."""
+    if n <= 1:
+        return False
+    if n <= 3:
+        return True
+    if n % 2 == 0:
+        return False
+    r, d = 0, n - 1
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for _ in range(int(math.log2(n))):
+        a = random.randrange(2, n - 1)
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def legacy_next_prime(n, test):
+    """Следующее простое перебором n + 1, n + 2, ... (прежняя реализация shamire.py)."""
+    while True:
+        n += 1
+        if test(n):
+            return n
+
+def elapsed(func, values):
+    """Время вызова func для всех values в секундах."""
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк проверки чисел на простоту")
+    parser.add_argument('--bits', type=int, nargs='+', default=[16, 32, 64, 128, 256, 512, 1024],
+                        help="Длины чисел в битах")
+    parser.add_argument('--count', type=int, default=200, help="Количество случайных нечетных чисел")
+    parser.add_argument('--next-count', type=int, default=5, help="Количество вызовов next_prime")
+    parser.add_argument('--bulk-bits', type=int, nargs='+', default=[20, 32, 48, 62],
+                        help="Длины чисел (не больше 64 бит) для проверки массивов")
+    parser.add_argument('--bulk-count', type=int, default=100000, help="Размер проверяемого массива")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    implementations = [("6k±1", trial_division_is_prime), ("MR блокнот", notebook_miller_rabin),
+                       ("primes.py", is_prime)]
+    print("Проверка случайных нечетных чисел / поиск следующего простого, с")
+    print(f"{'биты':>5}" + ''.join(f"{name:>24}" for name, _ in implementations))
+    for bits in args.bits:
+        numbers = [rng.getrandbits(bits) | (1 << (bits - 1)) | 1 for _ in range(args.count)]
+        starts = numbers[:args.next_count]
+        expected = [is_prime(n) for n in numbers]
+        cells = []
+        for name, test in implementations:
+            if test is trial_division_is_prime and bits > TRIAL_DIVISION_MAX_BITS:
+                cells.append('—')
+                continue
+            if test is not notebook_miller_rabin:
+                assert [test(n) for n in numbers] == expected, (name, bits)
+            check = elapsed(test, numbers)
+            if test is is_prime:
+                search = elapsed(next_prime, starts)
+            else:
+                search = elapsed(lambda n: legacy_next_prime(n, test), starts)
+            cells.append(f"{check:.4f} / {search:.4f}")
+        print(f"{bits:>5}" + ''.join(f"{cell:>24}" for cell in cells))
+
+    print()
+    print("Проверка массива случайных чисел, с")
+    print(f"{'биты':>5}{'is_prime':>14}{'is_prime_many':>16}{'ускорение':>12}")
+    generator = np.random.default_rng(0)
+    for bits in args.bulk_bits:
+        numbers = generator.integers(1 << (bits - 1), (1 << bits) - 1, args.bulk_count, dtype=np.uint64,
+                                     endpoint=True)
+        start = time.perf_counter()
+        expected = [is_prime(int(n)) for n in numbers]
+        scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        result = is_prime_many(numbers, workers=1)
+        vector = time.perf_counter() - start
+        assert result.tolist() == expected, bits
+        print(f"{bits:>5}{scalar:>14.4f}{vector:>16.4f}{scalar / vector:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/shamir.py
+#
+# Время генерации shares в shamire.py: прежнее вычисление полинома
+# (pow для каждого коэффициента в каждой точке) против схемы Горнера,
+# выполняемой сразу для всех точек. Запуск из корня репозитория:
+#
+#     python -m benchmarks.shamir [--thresholds 3 10 100] [--shares 10 1000 10000]
+
+import argparse
+import random
+import time
+
+from shamire import evaluate_points
+
+# Простые числа для полей разного размера (биты -> простое число)
+PRIMES = {
+    31: 2 ** 31 - 1,
+    61: 2 ** 61 - 1,
+    127: 2 ** 127 - 1,
+    521: 2 ** 521 - 1,
+}
+
+def legacy_evaluate_polynomial(coeffs, x, prime):
+    """Вычисление полинома через pow для каждого коэффициента (до оптимизации)."""
+    result = 0
+    for power, coeff in enumerate(coeffs):
+        result = (result + coeff * pow(x, power, prime)) % prime
+    return result
+
+def best_time(func, repeat):
+    """Лучшее время выполнения func() в секундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк генерации shares схемы Шамира")
+    parser.add_argument('--thresholds', type=int, nargs='+', default=[3, 10, 100], help="Пороги k")
+    parser.add_argument('--shares', type=int, nargs='+', default=[10, 1000, 10000], help="Количества частей n")
+    parser.add_argument('--bits', type=int, nargs='+', default=sorted(PRIMES), choices=sorted(PRIMES),
+                        help="Размеры простого числа в битах")
+    parser.add_argument('--legacy-points', type=int, default=1000,
+                        help="Прежний алгоритм измеряется на стольких точках и масштабируется до n")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'биты':>5}{'k':>6}{'n':>8}{'до, с':>12}{'после, с':>12}{'ускорение':>12}")
+    for bits in args.bits:
+        prime = PRIMES[bits]
+        for k in args.thresholds:
+            coeffs = [rng.randrange(prime) for _ in range(k)]
+            for n in args.shares:
+                xs = range(1, n + 1)
+                sample = xs[:args.legacy_points]
+                expected = [legacy_evaluate_polynomial(coeffs, x, prime) for x in sample]
+                assert evaluate_points(coeffs, sample, prime) == expected, (bits, k, n)
+                before = best_time(lambda: [legacy_evaluate_polynomial(coeffs, x, prime) for x in sample],
+                                   args.repeat) * n / len(sample)
+                after = best_time(lambda: evaluate_points(coeffs, xs, prime), args.repeat)
+                print(f"{bits:>5}{k:>6}{n:>8}{before:>12.4f}{after:>12.4f}{before / after:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# benchmarks/suite.py
+#
+# Воспроизводимый набор бенчмарков: потоковое шифрование и расшифрование
+# всех шифров на текстах от 1 КБ до 100 МБ, метод Касиски и конвейер
+# decryptionVigenere на растущих текстах, split_secret / restore_secret
+# для разных (k, n, размера секрета). Для каждого случая записываются
+# лучшее и медианное время повторов и пиковая память (tracemalloc,
+# отдельный прогон). Результаты сохраняются в JSON и сравниваются с
+# базовым файлом: случаи, ставшие медленнее или потребляющие больше
+# памяти сверх порога, помечаются как регрессии (код возврата 1).
+# Запуск из корня репозитория:
+#
+#     python -m benchmarks.suite [--sizes 1KB 1MB] [--only caesar shamir]
+#     python -m benchmarks.suite --json baseline.json
+#     python -m benchmarks.suite --baseline baseline.json --threshold 0.25
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from affine_cipher import affine_decrypt_stream, affine_encrypt_stream
+from alphabet import RUSSIAN
+from caesar_cipher import caesar_decrypt_stream, caesar_encrypt_stream
+from cipher_cli import DEFAULT_CHUNK_SIZE
+from decryptionVigenere import decrypt_vigenere, solve_vigenere_key, text_to_indices
+from kasiski import kasiski_examination
+from keylength import estimate_key_length
+from playfair_cipher import playfair_decrypt_stream, playfair_encrypt_stream
+from rail_fence_cipher import rail_fence_decrypt_stream, rail_fence_encrypt_stream
+from shamire import lagrange_weights, restore_secret, split_secret
+from substitution_cipher import (create_substitution_mapping, substitution_decrypt_stream,
+                                 substitution_encrypt_stream)
+from vigenere import vigenere_cipher_russian, vigenere_cipher_russian_stream, vigenere_decrypt_russian_stream
+
+# Размеры текстов для шифров и для анализа шифра Виженера
+DEFAULT_SIZES = ['1KB', '64KB', '1MB', '16MB', '100MB']
+DEFAULT_ANALYSIS_SIZES = ['1KB', '16KB', '256KB', '1MB']
+
+# Параметры схемы Шамира: пороги k, количества частей n, размеры секрета в байтах
+DEFAULT_THRESHOLDS = [3, 10]
+DEFAULT_SHARES = [10, 100]
+DEFAULT_SECRET_BYTES = [16, 64, 128]
+
+# Группы случаев (для --only)
+GROUPS = ['caesar', 'affine', 'substitution', 'playfair', 'rail_fence', 'vigenere',
+          'kasiski', 'vigenere_pipeline', 'shamir']
+
+# Повторы одного случая прекращаются, когда их суммарное время превышает бюджет (с)
+TIME_BUDGET = 2.0
+
+# Разница меньше этих значений не считается регрессией (шум измерений)
+TIME_NOISE_FLOOR = 1e-3
+MEMORY_NOISE_FLOOR = 64 << 10
+
+# Корпус русского текста для шифртекстов Виженера
+RUSSIAN_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'russian.txt')
+
+# Множители суффиксов размеров
+UNITS = {'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+# Ключи шифров
+SUBSTITUTION_KEY = 'phqgiumeaylnofdxjkrcvstzwb'
+PLAYFAIR_KEY = 'monarchy'
+VIGENERE_KEY = 'скрыть'
+
+def parse_size(text):
+    """Переводит размер вида '64KB', '100MB' или '4096' в байты."""
+    text = text.strip().upper()
+    for suffix, factor in UNITS.items():
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+def format_size(size):
+    """Обратное к parse_size представление размера."""
+    for suffix, factor in reversed(UNITS.items()):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix}"
+    return str(size)
+
+def latin_text(size, seed=0):
+    """Случайный латинский текст с пробелами и знаками препинания."""
+    symbols = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz' * 4 + b'ABCDEFGHIJKLMNOPQRSTUVWXYZ' * 2
+                            + b' ' * 20 + b'.,!?\n', dtype=np.uint8)
+    return np.random.default_rng(seed).choice(symbols, size).tobytes().decode('ascii')
+
+def russian_letters(size, seed=0):
+    """Случайная последовательность строчных букв русского алфавита."""
+    codes = np.random.default_rng(seed).choice(RUSSIAN.codes, size)
+    return codes.tobytes().decode('utf-32-le')
+
+def russian_ciphertext(size):
+    """
+    Шифртекст Виженера длиной size букв: русский текст RUSSIAN_CORPUS,
+    повторенный до нужной длины и зашифрованный ключом VIGENERE_KEY.
+    """
+    with open(RUSSIAN_CORPUS, encoding='utf-8') as file:
+        letters = RUSSIAN.decode(text_to_indices(file.read(), RUSSIAN))
+    plaintext = (letters * (size // len(letters) + 1))[:size]
+    return vigenere_cipher_russian(plaintext, VIGENERE_KEY)
+
+def vigenere_pipeline(ciphertext):
+    """Конвейер decryptionVigenere: длина ключа, ключ, расшифровка."""
+    indices = text_to_indices(ciphertext, RUSSIAN)
+    ranking = estimate_key_length(indices, alphabet_size=len(RUSSIAN))
+    period = ranking[0][0] if ranking else 1
+    key, _ = solve_vigenere_key(indices, period, RUSSIAN, top=1)[0]
+    return decrypt_vigenere(ciphertext, key, RUSSIAN)
+
+def chunked(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Генератор фрагментов текста, как при чтении файла в cipher_cli.py."""
+    return (text[i:i + chunk_size] for i in range(0, len(text), chunk_size))
+
+def drain(chunks):
+    """Получает все выходные фрагменты, не сохраняя их."""
+    for _ in chunks:
+        pass
+
+def cipher_cases(sizes):
+    """
+    Случаи шифрования и расшифрования через генераторы *_stream, как в
+    cipher_cli.py: память на случай ограничена фрагментом, а не всем текстом.
+    Тексты строятся лениво, поэтому в памяти одновременно находятся тексты
+    только одного размера.
+
+    :return: Генератор кортежей (группа, имя, параметры, функция, setup, объем данных).
+    """
+    encrypt_mapping, decrypt_mapping = create_substitution_mapping(SUBSTITUTION_KEY)
+    ciphers = [
+        ('caesar', lambda c: caesar_encrypt_stream(c, 3), lambda c: caesar_decrypt_stream(c, 3)),
+        ('affine', lambda c: affine_encrypt_stream(c, 5, 8), lambda c: affine_decrypt_stream(c, 5, 8)),
+        ('substitution', lambda c: substitution_encrypt_stream(c, encrypt_mapping),
+         lambda c: substitution_decrypt_stream(c, decrypt_mapping)),
+        ('playfair', lambda c: playfair_encrypt_stream(c, PLAYFAIR_KEY),
+         lambda c: playfair_decrypt_stream(c, PLAYFAIR_KEY)),
+        ('rail_fence', lambda c: rail_fence_encrypt_stream(c, 3), lambda c: rail_fence_decrypt_stream(c, 3)),
+        ('vigenere', lambda c: vigenere_cipher_russian_stream(c, VIGENERE_KEY),
+         lambda c: vigenere_decrypt_russian_stream(c, VIGENERE_KEY)),
+    ]
+    for size in sizes:
+        for name, encrypt, decrypt in ciphers:
+            plaintext = russian_letters(size) if name == 'vigenere' else latin_text(size)
+            yield name, f"{name} encrypt", {'size': size}, lambda: drain(encrypt(chunked(plaintext))), None, size
+            ciphertext = ''.join(encrypt(chunked(plaintext)))
+            del plaintext
+            yield (name, f"{name} decrypt", {'size': size}, lambda: drain(decrypt(chunked(ciphertext))), None,
+                   len(ciphertext))
+            del ciphertext
+
+def analysis_cases(sizes):
+    """Случаи метода Касиски и конвейера decryptionVigenere."""
+    for size in sizes:
+        ciphertext = russian_ciphertext(size)
+        yield 'kasiski', "kasiski_examination", {'size': size}, lambda: kasiski_examination(ciphertext), None, size
+        yield ('vigenere_pipeline', "decryptionVigenere pipeline", {'size': size},
+               lambda: vigenere_pipeline(ciphertext), None, size)
+
+def shamir_cases(thresholds, shares, secret_sizes):
+    """
+    Случаи split_secret и restore_secret. Перед каждым восстановлением кэш
+    коэффициентов Лагранжа очищается, чтобы измерялось полное восстановление.
+    """
+    rng = random.Random(0)
+    for secret_bytes in secret_sizes:
+        secret = rng.getrandbits(8 * secret_bytes)
+        for k in thresholds:
+            for n in shares:
+                if k > n:
+                    continue
+                params = {'k': k, 'n': n, 'secret_bytes': secret_bytes}
+                prime, parts = split_secret(secret, n, k)
+                assert restore_secret(parts[:k], prime) == secret, params
+                yield 'shamir', "split_secret", params, lambda: split_secret(secret, n, k), None, None
+                yield ('shamir', "restore_secret", params, lambda: restore_secret(parts[:k], prime),
+                       lagrange_weights.cache_clear, None)
+
+def measure(func, setup=None, repeat=5, budget=TIME_BUDGET):
+    """
+    Измеряет func: до repeat повторов (не меньше одного, пока не исчерпан
+    бюджет времени) и отдельный прогон под tracemalloc.
+
+    :param setup: Функция, вызываемая перед каждым прогоном вне измерения.
+    :return: Тройка (лучшее время, медианное время, количество повторов) и
+             пиковая память в байтах.
+    """
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat and (not times or time.perf_counter() - started < budget):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (min(times), statistics.median(times), len(times)), peak
+
+def result_key(result):
+    """Ключ сопоставления результата с базовым файлом."""
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+def compare(results, baseline, threshold):
+    """
+    Сравнивает результаты с базовыми.
+
+    :param results: Список результатов текущего запуска.
+    :param baseline: Список результатов базового запуска.
+    :param threshold: Допустимое относительное ухудшение (0.25 — на 25%).
+    :return: Список регрессий (ключ, метрика, было, стало).
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None:
+            continue
+        for metric, floor in (('seconds', TIME_NOISE_FLOOR), ('peak_bytes', MEMORY_NOISE_FLOOR)):
+            old, new = before[metric], result[metric]
+            if new > old * (1 + threshold) and new - old > floor:
+                regressions.append((result_key(result), metric, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Набор бенчмарков шифров, анализа Виженера и схемы Шамира")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="Размеры текстов шифров")
+    parser.add_argument('--analysis-sizes', nargs='+', default=DEFAULT_ANALYSIS_SIZES,
+                        help="Размеры шифртекстов для Касиски и конвейера decryptionVigenere")
+    parser.add_argument('--thresholds', type=int, nargs='+', default=DEFAULT_THRESHOLDS, help="Пороги k")
+    parser.add_argument('--shares', type=int, nargs='+', default=DEFAULT_SHARES, help="Количества частей n")
+    parser.add_argument('--secret-bytes', type=int, nargs='+', default=DEFAULT_SECRET_BYTES,
+                        help="Размеры секрета в байтах")
+    parser.add_argument('--only', nargs='+', choices=GROUPS, help="Запустить только эти группы")
+    parser.add_argument('--repeat', type=int, default=5, help="Наибольшее количество повторов")
+    parser.add_argument('--json', dest='output', help="Файл для результатов в формате JSON")
+    parser.add_argument('--baseline', help="JSON-файл предыдущего запуска для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Допустимое относительное ухудшение времени и памяти")
+    args = parser.parse_args(argv)
+
+    groups = set(args.only or GROUPS)
+    sizes = [parse_size(size) for size in args.sizes]
+    analysis_sizes = [parse_size(size) for size in args.analysis_sizes]
+    cases = [cipher_cases(sizes), analysis_cases(analysis_sizes),
+             shamir_cases(args.thresholds, args.shares, args.secret_bytes)]
+
+    results = []
+    print(f"{'случай':<30}{'параметры':<32}{'лучшее, с':>12}{'МБ/с':>10}{'память, МБ':>12}")
+    for group_cases in cases:
+        for group, name, params, func, setup, volume in group_cases:
+            if group not in groups:
+                continue
+            (best, median, repeats), peak = measure(func, setup, args.repeat)
+            result = {'group': group, 'name': name, 'params': params, 'seconds': best,
+                      'median_seconds': median, 'repeats': repeats, 'peak_bytes': peak}
+            if volume is not None:
+                result['mb_per_s'] = volume / best / 1e6
+            results.append(result)
+            label = ', '.join(f"{key}={format_size(value) if key == 'size' else value}"
+                              for key, value in params.items())
+            rate = f"{result['mb_per_s']:.2f}" if volume is not None else '—'
+            print(f"{name:<30}{label:<32}{best:>12.6f}{rate:>10}{peak / 1e6:>12.2f}", flush=True)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        print()
+        if not regressions:
+            print(f"Регрессий нет (порог {args.threshold:.0%}).")
+            return 0
+        print(f"Регрессии (порог {args.threshold:.0%}):")
+        for key, metric, old, new in regressions:
+            print(f"  {key}: {metric} {old:.6g} -> {new:.6g} ({new / old - 1:+.0%})")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# benchmarks/translate.py
+#
+# Пропускная способность одноалфавитных шифров до и после перехода на
+# таблицы str.translate. Запуск из корня репозитория:
+#
+#     python -m benchmarks.translate [--size МБ] [--repeat N]
+
+import argparse
+import random
+import string
+import time
+
+from affine_cipher import affine_decrypt, affine_encrypt
+from caesar_cipher import caesar_encrypt
+from substitution_cipher import create_substitution_mapping, substitution_decrypt, substitution_encrypt
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+def legacy_caesar_encrypt(plaintext, shift):
+    """Посимвольная реализация шифра Цезаря (до оптимизации)."""
+    encrypted = ''
+    for char in plaintext.lower():
+        if char in ALPHABET:
+            encrypted += ALPHABET[(ALPHABET.index(char) + shift) % len(ALPHABET)]
+        else:
+            encrypted += char
+    return encrypted
+
+def legacy_affine_encrypt(plaintext, a, b):
+    """Посимвольная реализация аффинного шифрования (до оптимизации)."""
+    encrypted = ''
+    for char in plaintext.lower():
+        if char in ALPHABET:
+            encrypted += ALPHABET[(a * ALPHABET.index(char) + b) % len(ALPHABET)]
+        else:
+            encrypted += char
+    return encrypted
+
+def legacy_affine_decrypt(ciphertext, a, b):
+    """Посимвольная реализация аффинного расшифрования (до оптимизации)."""
+    a_inv = pow(a, -1, len(ALPHABET))
+    decrypted = ''
+    for char in ciphertext.lower():
+        if char in ALPHABET:
+            decrypted += ALPHABET[(a_inv * (ALPHABET.index(char) - b)) % len(ALPHABET)]
+        else:
+            decrypted += char
+    return decrypted
+
+def legacy_substitution(text, mapping):
+    """Посимвольная реализация подстановки (до оптимизации)."""
+    result = ''
+    for char in text.lower():
+        if char in mapping:
+            result += mapping[char]
+        else:
+            result += char
+    return result
+
+def make_text(size, seed=0):
+    """Генерирует текст из букв, пробелов и знаков препинания заданного размера."""
+    rng = random.Random(seed)
+    symbols = string.ascii_letters * 4 + ' ' * 20 + '.,!?\n'
+    return ''.join(rng.choices(symbols, k=size))
+
+def throughput(func, text, repeat):
+    """Возвращает лучшую пропускную способность func(text) в МБ/с."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text) / best / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк одноалфавитных шифров")
+    parser.add_argument('--size', type=float, default=1.0, help="Размер текста в МБ")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов")
+    args = parser.parse_args()
+
+    text = make_text(int(args.size * 1e6))
+    encrypt_mapping, decrypt_mapping = create_substitution_mapping('phqgiumeaylnofdxjkrcvstzwb')
+    cases = [
+        ("caesar encrypt", lambda t: legacy_caesar_encrypt(t, 3), lambda t: caesar_encrypt(t, 3)),
+        ("affine encrypt", lambda t: legacy_affine_encrypt(t, 5, 8), lambda t: affine_encrypt(t, 5, 8)),
+        ("affine decrypt", lambda t: legacy_affine_decrypt(t, 5, 8), lambda t: affine_decrypt(t, 5, 8)),
+        ("substitution encrypt", lambda t: legacy_substitution(t, encrypt_mapping),
+         lambda t: substitution_encrypt(t, encrypt_mapping)),
+        ("substitution decrypt", lambda t: legacy_substitution(t, decrypt_mapping),
+         lambda t: substitution_decrypt(t, decrypt_mapping)),
+    ]
+
+    print(f"Размер текста: {len(text) / 1e6:.1f} МБ")
+    print(f"{'Операция':<22}{'до, МБ/с':>12}{'после, МБ/с':>14}{'ускорение':>12}")
+    for name, legacy, current in cases:
+        assert legacy(text) == current(text), name
+        before = throughput(legacy, text, args.repeat)
+        after = throughput(current, text, args.repeat)
+        print(f"{name:<22}{before:>12.2f}{after:>14.2f}{after / before:>11.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,56 @@
 # caesar_cipher.py
 
-def caesar_encrypt(plaintext, shift):
+from alphabet import LATIN
+from instrumentation import instrumented
+from monoalphabetic import shift_table, translate
+
+@instrumented(size_arg=0)
+def caesar_encrypt(plaintext, shift, alphabet=LATIN):
     """
     Шифрует текст методом Цезаря.
     
     :param plaintext: Открытый текст для шифрования.
     :param shift: Сдвиг (целое число).
+    :param alphabet: Алфавит (Alphabet или строка букв).
     :return: Зашифрованный текст.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
-    encrypted = ''
-
-    for char in plaintext.lower():
-        if char in alphabet:
-            idx = (alphabet.index(char) + shift) % len(alphabet)
-            encrypted += alphabet[idx]
-        else:
-            encrypted += char  # Не изменяем символы вне алфавита
+    return translate(plaintext, shift_table(shift, alphabet))
 
-    return encrypted
-
-def caesar_decrypt(ciphertext, shift):
+@instrumented(size_arg=0)
+def caesar_decrypt(ciphertext, shift, alphabet=LATIN):
     """
     Расшифровывает текст методом Цезаря.
     
     :param ciphertext: Зашифрованный текст.
     :param shift: Сдвиг (целое число).
+    :param alphabet: Алфавит (Alphabet или строка букв).
     :return: Расшифрованный текст.
     """
-    return caesar_encrypt(ciphertext, -shift)
+    return caesar_encrypt(ciphertext, -shift, alphabet)
+
+def caesar_encrypt_stream(chunks, shift, alphabet=LATIN):
+    """
+    Потоково шифрует текст методом Цезаря.
+
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param shift: Сдвиг (целое число).
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    table = shift_table(shift, alphabet)
+    for chunk in chunks:
+        yield translate(chunk, table)
+
+def caesar_decrypt_stream(chunks, shift, alphabet=LATIN):
+    """
+    Потоково расшифровывает текст методом Цезаря.
+
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param shift: Сдвиг (целое число).
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    return caesar_encrypt_stream(chunks, -shift, alphabet)
 
 def main():
     print("Шифр Цезаря")
@@ -0,0 +1,159 @@
+# cipher_cli.py
+#
+# Единая точка входа для потокового шифрования файлов и stdin/stdout.
+# Текст читается фрагментами фиксированного размера и проходит через
+# генераторы *_stream соответствующего шифра, поэтому объем памяти не
+# зависит от размера входных данных.
+#
+# Примеры:
+#     python cipher_cli.py caesar encrypt --shift 3 --in plain.txt --out cipher.txt
+#     cat cipher.txt | python cipher_cli.py playfair decrypt --key monarchy
+#     python cipher_cli.py vigenere encrypt --key скрыть --in plain.txt --profile trace.json
+
+import argparse
+import io
+import sys
+from contextlib import ExitStack
+
+from affine_cipher import affine_decrypt_stream, affine_encrypt_stream
+from alphabet import LATIN, RUSSIAN
+from caesar_cipher import caesar_decrypt_stream, caesar_encrypt_stream
+from instrumentation import add_profile_arguments, iter_stage, profiling
+from playfair_cipher import playfair_decrypt_stream, playfair_encrypt_stream
+from rail_fence_cipher import rail_fence_decrypt_stream, rail_fence_encrypt_stream
+from substitution_cipher import (create_substitution_mapping, substitution_decrypt_stream,
+                                 substitution_encrypt_stream)
+from vigenere import vigenere_cipher_russian_stream, vigenere_decrypt_russian_stream
+
+# Размер фрагмента по умолчанию (в символах)
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Алфавиты, доступные через --alphabet
+ALPHABETS = {'latin': LATIN, 'russian': RUSSIAN}
+
+def read_chunks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Читает текстовый поток фрагментами фиксированного размера.
+
+    :param stream: Текстовый поток.
+    :param chunk_size: Размер фрагмента в символах.
+    :return: Генератор фрагментов.
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+def write_chunks(stream, chunks):
+    """
+    Записывает фрагменты в текстовый поток по мере их получения.
+
+    :param stream: Текстовый поток.
+    :param chunks: Итерируемый набор фрагментов.
+    """
+    for chunk in chunks:
+        stream.write(chunk)
+
+def build_pipeline(args, chunks):
+    """
+    Строит генератор преобразования для выбранного шифра и действия.
+
+    :param args: Разобранные аргументы командной строки.
+    :param chunks: Генератор входных фрагментов.
+    :return: Генератор выходных фрагментов.
+    """
+    encrypt = args.action == 'encrypt'
+    if args.cipher == 'caesar':
+        stream = caesar_encrypt_stream if encrypt else caesar_decrypt_stream
+        return stream(chunks, args.shift, ALPHABETS[args.alphabet])
+    if args.cipher == 'affine':
+        stream = affine_encrypt_stream if encrypt else affine_decrypt_stream
+        return stream(chunks, args.a, args.b, ALPHABETS[args.alphabet])
+    if args.cipher == 'substitution':
+        encrypt_mapping, decrypt_mapping = create_substitution_mapping(args.key, ALPHABETS[args.alphabet])
+        if encrypt:
+            return substitution_encrypt_stream(chunks, encrypt_mapping)
+        return substitution_decrypt_stream(chunks, decrypt_mapping)
+    if args.cipher == 'playfair':
+        stream = playfair_encrypt_stream if encrypt else playfair_decrypt_stream
+        return stream(chunks, args.key)
+    if args.cipher == 'rail_fence':
+        stream = rail_fence_encrypt_stream if encrypt else rail_fence_decrypt_stream
+        return stream(chunks, args.rails)
+    if args.cipher == 'vigenere':
+        stream = vigenere_cipher_russian_stream if encrypt else vigenere_decrypt_russian_stream
+        return stream(chunks, args.key, RUSSIAN, args.passthrough)
+    raise ValueError(f"Неизвестный шифр: {args.cipher}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковое шифрование и расшифровка текста")
+    ciphers = parser.add_subparsers(dest='cipher', required=True)
+
+    def add_cipher(name, help_text, actions=('encrypt', 'decrypt')):
+        sub = ciphers.add_parser(name, help=help_text)
+        sub.add_argument('action', choices=actions)
+        sub.add_argument('--in', dest='input', default='-',
+                         help="Входной файл (по умолчанию stdin)")
+        sub.add_argument('--out', dest='output', default='-',
+                         help="Выходной файл (по умолчанию stdout)")
+        sub.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                         help="Размер фрагмента в символах")
+        add_profile_arguments(sub)
+        return sub
+
+    def add_alphabet(sub):
+        sub.add_argument('--alphabet', choices=sorted(ALPHABETS), default='latin',
+                         help="Алфавит (по умолчанию latin)")
+        return sub
+
+    add_alphabet(add_cipher('caesar', "Шифр Цезаря")).add_argument('--shift', type=int, required=True)
+    affine = add_alphabet(add_cipher('affine', "Аффинный шифр"))
+    affine.add_argument('--a', type=int, required=True)
+    affine.add_argument('--b', type=int, required=True)
+    add_alphabet(add_cipher('substitution', "Подстановочный шифр")).add_argument('--key', required=True)
+    add_cipher('playfair', "Шифр Плейфера").add_argument('--key', required=True)
+    add_cipher('rail_fence', "Шифр Rail Fence").add_argument('--rails', type=int, required=True)
+    vigenere = add_cipher('vigenere', "Шифр Виженера (русский алфавит)")
+    vigenere.add_argument('--key', required=True)
+    vigenere.add_argument('--passthrough', action='store_true',
+                          help="Сохранять символы вне алфавита (иначе удаляются пробелы и переводы строк)")
+    return parser.parse_args(argv)
+
+def open_text(path, mode):
+    """
+    Открывает файл или stdin/stdout ('-') в кодировке UTF-8 без
+    преобразования переводов строк.
+    """
+    if path == '-':
+        raw = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+        return io.TextIOWrapper(raw, encoding='utf-8', newline='', write_through=True)
+    return open(path, mode, encoding='utf-8', newline='')
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.chunk_size <= 0:
+        print("Размер фрагмента должен быть положительным.", file=sys.stderr)
+        return 2
+
+    with ExitStack() as stack:
+        try:
+            source = open_text(args.input, 'r')
+            if args.input != '-':
+                stack.enter_context(source)
+            target = open_text(args.output, 'w')
+            if args.output != '-':
+                stack.enter_context(target)
+            else:
+                # stdout не закрывается, только сбрасывается
+                stack.callback(target.flush)
+            with profiling(args.profile, args.profile_allocations):
+                chunks = iter_stage('cipher_cli.read', read_chunks(source, args.chunk_size))
+                write_chunks(target, iter_stage(f"{args.cipher}.{args.action}", build_pipeline(args, chunks)))
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,22 @@
+import codecs
 import math
+import mmap
+from array import array
 from collections import defaultdict, Counter
 from functools import reduce
 import string
 
+import numpy as np
+
+from alphabet import RUSSIAN, as_alphabet
+from frequencies import RUSSIAN_FREQUENCIES
+from instrumentation import RESULT, instrumented
+from keylength import column_histograms, estimate_key_length, repeated_distances
+
+# Размер фрагмента файла, декодируемого за один шаг (в байтах)
+READ_CHUNK_SIZE = 1 << 22
+
+@instrumented(size_arg=RESULT)
 def read_ciphertext(filename):
     """
     Читает зашифрованный текст из файла и удаляет пробелы и перевод строки.
@@ -12,10 +26,53 @@ def read_ciphertext(filename):
     text = text.lower().replace(' ', '').replace('\n', '')
     return text
 
+def text_to_indices(text, alphabet):
+    """
+    Переводит строку в массив индексов алфавита (numpy uint8).
+    Символы вне алфавита отбрасываются, регистр не учитывается.
+    """
+    return as_alphabet(alphabet).encode(text)
+
+def indices_to_text(indices, alphabet):
+    """
+    Переводит массив индексов алфавита обратно в строку.
+    """
+    return as_alphabet(alphabet).decode(indices)
+
+@instrumented(size_arg=RESULT)
+def read_ciphertext_indices(filename, alphabet):
+    """
+    Читает зашифрованный текст из файла через mmap и за один проход
+    переводит его в компактный массив индексов алфавита (numpy uint8).
+    Файл декодируется фрагментами по READ_CHUNK_SIZE байт, поэтому
+    промежуточные строки не превышают размер фрагмента. Пробелы, переводы
+    строк и прочие символы вне алфавита отбрасываются.
+    """
+    alphabet = as_alphabet(alphabet)
+    indices = array('B')
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(filename, 'rb') as file:
+        size = file.seek(0, 2)
+        if size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for start in range(0, size, READ_CHUNK_SIZE):
+                    text = decoder.decode(mapped[start:start + READ_CHUNK_SIZE])
+                    indices.frombytes(alphabet.encode(text))
+    indices.frombytes(alphabet.encode(decoder.decode(b'', final=True)))
+    return np.frombuffer(indices, dtype=np.uint8)
+
+@instrumented(size_arg=0)
 def kasiski_examination(ciphertext, seq_len=6):
     """
     Реализация метода Касиски для определения длины ключа.
+    Принимает строку или массив индексов из read_ciphertext_indices.
     """
+    if isinstance(ciphertext, np.ndarray):
+        distances = repeated_distances(ciphertext, seq_len)
+        if not len(distances):
+            return None  # Не удалось определить длину ключа
+        return int(np.gcd.reduce(distances))
+
     # Найти все повторяющиеся последовательности длиной seq_len
     sequences = defaultdict(list)
     for i in range(len(ciphertext) - seq_len + 1):
@@ -37,22 +94,30 @@ def kasiski_examination(ciphertext, seq_len=6):
     key_length = reduce(math.gcd, distances)
     return key_length
 
+@instrumented(size_arg=0)
 def split_into_columns(ciphertext, key_length):
     """
     Разбивает текст на столбцы по длине ключа.
+    Для массива индексов столбцы — срезы с шагом key_length без копирования.
     """
+    if isinstance(ciphertext, np.ndarray):
+        return [ciphertext[i::key_length] for i in range(key_length)]
     columns = ['' for _ in range(key_length)]
     for index, char in enumerate(ciphertext):
         columns[index % key_length] += char
     return columns
 
+@instrumented()
 def compute_letter_frequencies(columns, alphabet):
     """
     Подсчитывает частоты появления каждой буквы в каждом столбце.
     """
-    letter_to_index = {char: idx for idx, char in enumerate(alphabet)}
+    letter_to_index = as_alphabet(alphabet).index
     frequencies = []
     for column in columns:
+        if isinstance(column, np.ndarray):
+            frequencies.append(np.bincount(column, minlength=len(alphabet))[:len(alphabet)].tolist())
+            continue
         count = [0] * len(alphabet)
         for char in column:
             if char in letter_to_index:
@@ -76,39 +141,87 @@ def mutual_index_of_coincidence(count1, count2, len1, len2):
     """
     return sum(c1 * c2 for c1, c2 in zip(count1, count2)) / (len1 * len2) if len1 > 0 and len2 > 0 else 0
 
-def find_key_shifts(frequencies, alphabet):
+def shift_scores(histograms, reference):
     """
-    Определяет сдвиги для каждого столбца ключа на основе индекса совпадения.
+    Вычисляет взаимный индекс совпадения каждого столбца со сдвинутым
+    эталонным распределением для всех сдвигов сразу (циклическая
+    взаимная корреляция в виде произведения матриц).
+    
+    :param histograms: Матрица частот формы (key_length, m).
+    :param reference: Эталонные частоты букв языка (длина m).
+    :return: Матрица оценок формы (key_length, m): оценка сдвига s для столбца.
+    """
+    histograms = np.asarray(histograms, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    m = len(reference)
+    # circulant[s, y] = reference[(y - s) mod m]: буква y шифртекста при сдвиге s
+    circulant = reference[(np.arange(m)[None, :] - np.arange(m)[:, None]) % m]
+    totals = histograms.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1
+    return histograms @ circulant.T / totals
+
+def rank_candidate_keys(scores, top=10):
+    """
+    Перечисляет лучшие ключи по сумме оценок столбцов. Оценка ключа
+    аддитивна по столбцам, поэтому лучевой поиск шириной top точен.
+    
+    :param scores: Матрица оценок из shift_scores.
+    :param top: Количество кандидатов.
+    :return: Список пар (сдвиги, средняя оценка), по убыванию оценки.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    beam = [((), 0.0)]
+    for column in scores:
+        best_shifts = np.argsort(column)[::-1][:top]
+        candidates = [(shifts + (int(s),), total + column[s])
+                      for shifts, total in beam for s in best_shifts]
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        beam = candidates[:top]
+    key_length = max(len(scores), 1)
+    return [(list(shifts), float(total / key_length)) for shifts, total in beam]
+
+@instrumented(size_arg=0)
+def solve_vigenere_key(indices, key_length, alphabet, reference=RUSSIAN_FREQUENCIES, top=10):
     """
-    key_shifts = []
-    expected_ic = 0.054  # Ожидаемый индекс совпадения для русского языка
+    Восстанавливает ключ Виженера известной длины по массиву индексов.
     
-    for count in frequencies:
-        total = sum(count)
-        max_ic = 0
-        best_shift = 0
-        for shift in range(len(alphabet)):
-            shifted_count = count[shift:] + count[:shift]
-            ic = mutual_index_of_coincidence(count, shifted_count, total, total)
-            if ic > max_ic:
-                max_ic = ic
-                best_shift = shift
-        key_shifts.append(best_shift)
-    return key_shifts
+    :param indices: Массив индексов алфавита.
+    :param key_length: Длина ключа.
+    :param alphabet: Алфавит.
+    :param reference: Эталонные частоты букв языка.
+    :param top: Количество кандидатов.
+    :return: Список пар (ключ, оценка), по убыванию оценки.
+    """
+    histograms = column_histograms(indices, key_length, len(alphabet))
+    ranked = rank_candidate_keys(shift_scores(histograms, reference), top)
+    return [(''.join(alphabet[s] for s in shifts), score) for shifts, score in ranked]
+
+@instrumented()
+def find_key_shifts(frequencies, alphabet, reference=RUSSIAN_FREQUENCIES):
+    """
+    Определяет сдвиги для каждого столбца ключа: выбирается сдвиг с
+    наибольшим взаимным индексом совпадения с частотами языка.
+    """
+    if not len(frequencies):
+        return []
+    return [int(s) for s in np.argmax(shift_scores(frequencies, reference), axis=1)]
 
 def shift_letter(char, shift, alphabet):
     """
     Сдвигает букву на заданный сдвиг по алфавиту.
     """
+    alphabet = str(alphabet)
     index = alphabet.find(char)
     if index == -1:
         return char  # Не изменяем символ, если его нет в алфавите
     return alphabet[(index + shift) % len(alphabet)]
 
+@instrumented(size_arg=0)
 def decrypt_vigenere(ciphertext, key, alphabet):
     """
     Расшифровывает текст методом Виженера с заданным ключом.
     """
+    alphabet = str(alphabet)
     decrypted = []
     key_length = len(key)
     for i, char in enumerate(ciphertext):
@@ -122,23 +235,26 @@ def decrypt_vigenere(ciphertext, key, alphabet):
     return ''.join(decrypted)
 
 def main():
-    # Определение русского алфавита с буквой 'ё'
-    alphabet = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+    # Русский алфавит с буквой 'ё'
+    alphabet = RUSSIAN
     
-    # Чтение зашифрованного текста из файла
-    ciphertext = read_ciphertext('file1')
+    # Чтение зашифрованного текста из файла в массив индексов
+    indices = read_ciphertext_indices('file1', alphabet)
+    ciphertext = indices_to_text(indices, alphabet)
     print(f"Зашифрованный текст: {ciphertext}")
     
-    # Метод Касиски для определения длины ключа
-    key_length = kasiski_examination(ciphertext, seq_len=6)
-    if key_length:
-        print(f"Длина ключа, определенная методом Касиски: {key_length}")
-    else:
-        print("Не удалось определить длину ключа методом Касиски.")
+    # Методы Касиски и Фридмана для определения длины ключа
+    ranking = estimate_key_length(indices, alphabet_size=len(alphabet))
+    for period, confidence in ranking[:5]:
+        print(f"Длина ключа {period}: уверенность {confidence:.3f}")
+    if not ranking or ranking[0][1] == 0:
+        print("Не удалось определить длину ключа.")
         return
+    key_length = ranking[0][0]
+    print(f"Длина ключа: {key_length}")
     
     # Разбиение текста на столбцы по длине ключа
-    columns = split_into_columns(ciphertext, key_length)
+    columns = split_into_columns(indices, key_length)
     
     # Подсчет частот букв в каждом столбце
     frequencies = compute_letter_frequencies(columns, alphabet)
@@ -156,6 +272,10 @@ def main():
     key = ''.join([alphabet[shift] for shift in key_shifts])
     print(f"Предполагаемый ключ: {key}")
     
+    # Ранжированные кандидаты ключа
+    for candidate, score in solve_vigenere_key(indices, key_length, alphabet, top=5):
+        print(f"Кандидат: {candidate} (оценка {score:.4f})")
+    
     # Запрос ввода ключа у пользователя
     user_key = input("Введите ключ для расшифровки: ").lower()
     
@@ -0,0 +1,29 @@
+# frequencies.py
+#
+# Эталонные частоты букв языков для частотного анализа (взлом аффинного
+# шифра и шифра Виженера).
+
+from alphabet import LATIN, RUSSIAN
+
+# Частоты букв английского языка в порядке алфавита 'abcdefghijklmnopqrstuvwxyz'
+ENGLISH_FREQUENCIES = [
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015, 0.06094,
+    0.06966, 0.00153, 0.00772, 0.04025, 0.02406, 0.06749, 0.07507, 0.01929,
+    0.00095, 0.05987, 0.06327, 0.09056, 0.02758, 0.00978, 0.02360, 0.00150,
+    0.01974, 0.00074,
+]
+
+# Частоты букв русского языка в порядке алфавита 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+RUSSIAN_FREQUENCIES = [
+    0.07998, 0.01592, 0.04533, 0.01687, 0.02977, 0.08483, 0.00013, 0.00940,
+    0.01641, 0.07367, 0.01208, 0.03486, 0.04343, 0.03203, 0.06700, 0.10983,
+    0.02804, 0.04746, 0.05473, 0.06318, 0.02615, 0.00267, 0.00966, 0.00486,
+    0.01450, 0.00718, 0.00361, 0.00037, 0.01898, 0.01735, 0.00331, 0.00639,
+    0.02001,
+]
+
+# Эталонные частоты букв по алфавиту
+LANGUAGE_FREQUENCIES = {
+    LATIN: ENGLISH_FREQUENCIES,
+    RUSSIAN: RUSSIAN_FREQUENCIES,
+}
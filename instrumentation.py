@@ -0,0 +1,322 @@
+# instrumentation.py
+#
+# Необязательная инструментовка этапов: время, количество вызовов,
+# объем обработанных данных и выделения памяти по именованным этапам.
+# Этапы отмечаются декоратором instrumented, контекстным менеджером stage
+# или оберткой iter_stage для потоковых генераторов. Пока инструментовка
+# выключена, декоратор проверяет один флаг и сразу вызывает функцию, а
+# stage и iter_stage возвращают общий пустой контекст и исходный итератор.
+#
+# Включение:
+#     CIPHERS_PROFILE=1 python decryptionVigenere.py            — сводка в stderr при выходе
+#     CIPHERS_PROFILE=trace.json python kasiski.py              — сводка и трассировка Chrome
+#     python cipher_cli.py caesar encrypt --shift 3 --profile trace.json < plain.txt
+#
+# Выделения памяти (tracemalloc) учитываются, если трассировка памяти
+# запущена: PYTHONTRACEMALLOC=1, --profile-allocations или
+# enable(allocations=True). Трассировку открывают chrome://tracing или
+# https://ui.perfetto.dev. Учитывается только текущий процесс: этапы в
+# процессах-исполнителях пулов не попадают в сводку.
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Переменная окружения: '1' — сводка при выходе, иначе путь к файлу трассировки
+ENV_VAR = 'CIPHERS_PROFILE'
+
+# Наибольшее количество событий трассировки (остальные учитываются только в сводке)
+MAX_TRACE_EVENTS = 1 << 20
+
+# Значение size_arg, при котором объем данных берется из результата функции
+RESULT = 'return'
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}
+_events = []
+_origin = time.perf_counter()
+_NULL_STAGE = nullcontext()
+
+class StageStats:
+    """Накопленные показатели одного этапа."""
+
+    __slots__ = ('calls', 'seconds', 'bytes', 'allocated', 'peak')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.allocated = 0
+        self.peak = 0
+
+    def as_dict(self):
+        return {'calls': self.calls, 'seconds': self.seconds, 'bytes': self.bytes,
+                'allocated_bytes': self.allocated, 'peak_bytes': self.peak}
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def size_of(value):
+    """
+    Объем данных значения в байтах: nbytes для массивов numpy, длина для
+    bytes-подобных объектов и строк (в символах), 0 для остальных.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    return 0
+
+class _Stage:
+    """Контекст одного выполнения этапа."""
+
+    __slots__ = ('name', 'nbytes', 'start', 'memory', 'peak')
+
+    def __init__(self, name, nbytes=0):
+        self.name = name
+        self.nbytes = nbytes
+        self.memory = None
+
+    def __enter__(self):
+        stack = _stack()
+        if tracemalloc.is_tracing():
+            # Пик сбрасывается для каждого этапа; пик внешнего этапа
+            # сохраняется перед сбросом и дополняется пиками вложенных
+            current, peak = tracemalloc.get_traced_memory()
+            if stack and stack[-1].memory is not None:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.memory = self.peak = current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        stack = _stack()
+        stack.pop()
+        allocated = peak = 0
+        if self.memory is not None and tracemalloc.is_tracing():
+            current, traced_peak = tracemalloc.get_traced_memory()
+            absolute = max(self.peak, traced_peak)
+            allocated = max(0, current - self.memory)
+            peak = absolute - self.memory
+            if stack and stack[-1].memory is not None:
+                stack[-1].peak = max(stack[-1].peak, absolute)
+        if self.nbytes is not None:
+            _record(self.name, self.start, end, self.nbytes, allocated, peak)
+        return False
+
+def _record(name, start, end, nbytes, allocated, peak):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = StageStats()
+        stats.calls += 1
+        stats.seconds += end - start
+        stats.bytes += nbytes
+        stats.allocated += allocated
+        stats.peak = max(stats.peak, peak)
+        if len(_events) < MAX_TRACE_EVENTS:
+            args = {'bytes': nbytes}
+            if allocated or peak:
+                args.update(allocated_bytes=allocated, peak_bytes=peak)
+            _events.append({'name': name, 'cat': 'stage', 'ph': 'X',
+                            'ts': (start - _origin) * 1e6, 'dur': (end - start) * 1e6,
+                            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+
+def enabled():
+    """Включена ли инструментовка."""
+    return _enabled
+
+def enable(allocations=False):
+    """
+    Включает инструментовку.
+
+    :param allocations: Запустить tracemalloc для учета выделений памяти.
+    """
+    global _enabled
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+def disable():
+    """Выключает инструментовку; накопленные данные сохраняются."""
+    global _enabled
+    _enabled = False
+
+def reset():
+    """Удаляет накопленные показатели и события."""
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+def stage(name, nbytes=0):
+    """
+    Контекстный менеджер этапа. Объем данных можно дополнить внутри
+    этапа через add_bytes.
+
+    :param name: Имя этапа.
+    :param nbytes: Объем обработанных данных в байтах.
+    """
+    return _Stage(name, nbytes) if _enabled else _NULL_STAGE
+
+def add_bytes(nbytes):
+    """Прибавляет nbytes к объему данных текущего (самого внутреннего) этапа."""
+    if _enabled:
+        stack = _stack()
+        if stack:
+            stack[-1].nbytes += nbytes
+
+def _argument_size(args, kwargs, size_arg):
+    if isinstance(size_arg, int):
+        return size_of(args[size_arg]) if size_arg < len(args) else 0
+    return size_of(kwargs.get(size_arg))
+
+def instrumented(name=None, size_arg=None):
+    """
+    Декоратор этапа. Пока инструментовка выключена, обертка только
+    проверяет флаг и вызывает функцию.
+
+    :param name: Имя этапа (по умолчанию 'модуль.функция').
+    :param size_arg: Номер или имя аргумента, объем которого считается
+                     обработанными данными, либо RESULT — объем результата.
+    """
+    def decorate(func):
+        module = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+        stage_name = name or f"{module}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            nbytes = 0 if size_arg is None or size_arg == RESULT else _argument_size(args, kwargs, size_arg)
+            with _Stage(stage_name, nbytes) as current:
+                result = func(*args, **kwargs)
+                if size_arg == RESULT:
+                    current.nbytes = size_of(result)
+            return result
+
+        return wrapper
+    return decorate
+
+def iter_stage(name, iterable):
+    """
+    Учитывает каждое получение элемента итератора как вызов этапа name,
+    объем данных — объем элемента. Если инструментовка выключена,
+    возвращает iterable без изменений.
+    """
+    return _timed_iter(name, iterable) if _enabled else iterable
+
+def _timed_iter(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        with _Stage(name) as current:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                # Исчерпание итератора не считается вызовом
+                current.nbytes = None
+                return
+            current.nbytes = size_of(item)
+        yield item
+
+def stats():
+    """
+    Показатели этапов.
+
+    :return: Словарь {имя этапа: {calls, seconds, bytes, allocated_bytes, peak_bytes}}.
+    """
+    with _lock:
+        return {name: stage_stats.as_dict() for name, stage_stats in _stats.items()}
+
+def summary():
+    """
+    Таблица показателей этапов, отсортированная по суммарному времени.
+    Время вложенных этапов входит во время внешних.
+    """
+    rows = sorted(stats().items(), key=lambda item: item[1]['seconds'], reverse=True)
+    width = max([len(name) for name, _ in rows] + [len('этап')])
+    lines = [f"{'этап':<{width}}{'вызовы':>9}{'всего, с':>12}{'среднее, мс':>13}{'МБ':>10}{'МБ/с':>10}"
+             f"{'выделено, МБ':>14}{'пик, МБ':>10}"]
+    for name, row in rows:
+        mean = row['seconds'] / row['calls'] * 1e3
+        rate = f"{row['bytes'] / row['seconds'] / 1e6:.1f}" if row['bytes'] and row['seconds'] else '—'
+        lines.append(f"{name:<{width}}{row['calls']:>9}{row['seconds']:>12.4f}{mean:>13.3f}"
+                     f"{row['bytes'] / 1e6:>10.2f}{rate:>10}{row['allocated_bytes'] / 1e6:>14.2f}"
+                     f"{row['peak_bytes'] / 1e6:>10.2f}")
+    return '\n'.join(lines)
+
+def write_trace(path):
+    """
+    Записывает события в формате Chrome Trace Event (JSON) вместе со
+    сводкой показателей в поле otherData.
+    """
+    with _lock:
+        events = list(_events)
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+                   'args': {'name': os.path.basename(sys.argv[0]) or 'python'}})
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'stages': stats()}},
+                  file, ensure_ascii=False)
+
+def report(trace_path=None, stream=None):
+    """
+    Выводит сводку в stream (по умолчанию stderr) и при необходимости
+    записывает трассировку.
+    """
+    stream = stream or sys.stderr
+    print(summary(), file=stream)
+    if trace_path:
+        write_trace(trace_path)
+        print(f"Трассировка записана в {trace_path}", file=stream)
+
+@contextmanager
+def profiling(trace_path=None, allocations=False):
+    """
+    Включает инструментовку на время блока и выводит отчет по выходе.
+
+    :param trace_path: None — инструментовка не включается; '' — только
+                       сводка; путь — сводка и трассировка Chrome.
+    :param allocations: Учитывать выделения памяти.
+    """
+    if trace_path is None:
+        yield
+        return
+    enable(allocations)
+    try:
+        yield
+    finally:
+        disable()
+        report(trace_path)
+
+def add_profile_arguments(parser):
+    """Добавляет в argparse-парсер параметры --profile и --profile-allocations."""
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE.json',
+                        help="Профилировать этапы: сводка в stderr и, если указан файл, трассировка Chrome")
+    parser.add_argument('--profile-allocations', action='store_true',
+                        help="При профилировании учитывать выделения памяти (tracemalloc)")
+    return parser
+
+def _enable_from_environment():
+    value = os.environ.get(ENV_VAR, '')
+    if value.lower() in ('', '0', 'false', 'no'):
+        return
+    enable()
+    trace_path = None if value.lower() in ('1', 'true', 'yes') else value
+    atexit.register(report, trace_path)
+
+_enable_from_environment()
@@ -3,6 +3,15 @@ from collections import defaultdict, Counter
 from math import gcd
 from functools import reduce
 
+from alphabet import RUSSIAN
+from decryptionVigenere import text_to_indices
+from instrumentation import instrumented
+from keylength import estimate_key_length
+
+# Русский алфавит с буквой 'ё'
+ALPHABET = RUSSIAN
+
+@instrumented(size_arg=0)
 def find_repeated_sequences(ciphertext, seq_len=3):
     """
     Находит все повторяющиеся последовательности длиной seq_len в ciphertext.
@@ -33,6 +42,7 @@ def get_factors(n):
                 factors.add(n // i)
     return factors
 
+@instrumented(size_arg=0)
 def kasiski_examination(ciphertext, seq_len=3):
     """
     Реализация метода Касиски.
@@ -68,5 +78,10 @@ def main():
     else:
         print("Повторяющиеся последовательности не найдены. Метод Касиски не дал результатов.")
 
+    ranking = estimate_key_length(text_to_indices(ciphertext, ALPHABET), alphabet_size=len(ALPHABET))
+    print("Совместная оценка Касиски и Фридмана (длина: уверенность):")
+    for length, confidence in ranking[:5]:
+        print(f"{length}: {confidence:.3f}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,134 @@
+# key_cache.py
+#
+# Общий для процесса кэш скомпилированных ключей: таблицы str.translate
+# шифров Цезаря, аффинного и подстановочного, таблицы биграмм Плейфера и
+# периоды сдвигов Виженера. Записи хранятся по ключу (шифр,
+# нормализованный ключ, алфавит) в порядке последнего использования;
+# при превышении размера вытесняются самые старые, а при заданном TTL
+# записи устаревают через ttl секунд после построения. Кэш защищен
+# блокировкой и может использоваться из нескольких потоков.
+#
+# Размер и TTL кэша по умолчанию задаются переменными окружения
+# CIPHERS_KEY_CACHE_SIZE и CIPHERS_KEY_CACHE_TTL (в секундах) или
+# методом KEY_CACHE.configure.
+
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# Размер кэша по умолчанию (количество ключей)
+DEFAULT_MAXSIZE = 1024
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'expirations', 'size', 'maxsize', 'ttl'])
+CacheStats.__doc__ = """
+Счетчики кэша: попадания, промахи, вытеснения по размеру, устаревания
+по TTL, текущее количество записей и ограничения.
+"""
+
+class KeyCache:
+    """
+    Ограниченный LRU-кэш скомпилированных ключей с необязательным TTL.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=None, clock=time.monotonic):
+        """
+        :param maxsize: Наибольшее количество записей (0 — кэш отключен).
+        :param ttl: Время жизни записи в секундах (None — без ограничения).
+        :param clock: Монотонные часы (секунды).
+        """
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._clock = clock
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize=None, ttl=None):
+        """
+        Меняет ограничения кэша; лишние записи вытесняются сразу.
+
+        :param maxsize: Новый размер (None — не менять).
+        :param ttl: Новое время жизни в секундах (None — не менять; 0 или
+                    отрицательное значение снимает ограничение).
+        """
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("Размер кэша не может быть отрицательным.")
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl if ttl > 0 else None
+            self._trim()
+
+    def _trim(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_build(self, cipher, key, alphabet, build, *args):
+        """
+        Возвращает запись кэша, при промахе строит ее вызовом build(*args).
+        Построение выполняется без блокировки; если два потока одновременно
+        строят одну запись, сохраняется и возвращается первая.
+
+        :param cipher: Имя шифра (пространство ключей).
+        :param key: Нормализованный ключ (хешируемый).
+        :param alphabet: Алфавит (Alphabet или None).
+        :param build: Функция построения записи.
+        :return: Запись (скомпилированный ключ). Записи общие для всех
+                 вызывающих, их нельзя изменять.
+        """
+        cache_key = (cipher, key, alphabet)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self._clock():
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return value
+                del self._entries[cache_key]
+                self.expirations += 1
+            self.misses += 1
+
+        value = build(*args)
+        with self._lock:
+            if not self.maxsize:
+                return value
+            entry = self._entries.get(cache_key)
+            if entry is not None and (entry[1] is None or entry[1] > self._clock()):
+                return entry[0]
+            expires = None if self.ttl is None else self._clock() + self.ttl
+            self._entries[cache_key] = (value, expires)
+            self._entries.move_to_end(cache_key)
+            self._trim()
+        return value
+
+    def clear(self):
+        """Удаляет все записи и обнуляет счетчики."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """
+        Текущие счетчики кэша.
+
+        :return: CacheStats.
+        """
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.expirations,
+                              len(self._entries), self.maxsize, self.ttl)
+
+    def __len__(self):
+        return len(self._entries)
+
+def _from_environment():
+    maxsize = int(os.environ.get('CIPHERS_KEY_CACHE_SIZE', DEFAULT_MAXSIZE))
+    ttl = os.environ.get('CIPHERS_KEY_CACHE_TTL')
+    return KeyCache(maxsize, float(ttl) if ttl else None)
+
+# Кэш ключей, общий для всех шифров процесса
+KEY_CACHE = _from_environment()
@@ -0,0 +1,149 @@
+# keylength.py
+#
+# Оценка длины ключа полиалфавитного шифра за один линейный проход:
+# метод Касиски (расстояния между повторами n-грамм) и метод Фридмана
+# (средний индекс совпадения столбцов) объединяются в одну оценку.
+
+import numpy as np
+
+from instrumentation import instrumented
+
+# Индекс совпадения русского текста (сумма квадратов частот букв)
+RUSSIAN_IC = 0.0559
+
+# Максимальное значение упакованного кода n-граммы
+MAX_PACKED_CODE = 1 << 62
+
+def ngram_codes(indices, seq_len, radix):
+    """
+    Упаковывает все n-граммы массива индексов в целые числа по схеме Горнера
+    поверх сдвинутых срезов-представлений массива (без создания подстрок).
+
+    :param indices: Массив индексов алфавита (numpy uint8).
+    :param seq_len: Длина n-граммы.
+    :param radix: Основание упаковки (размер алфавита).
+    :return: Массив кодов длины len(indices) - seq_len + 1.
+    """
+    if radix ** seq_len >= MAX_PACKED_CODE:
+        raise ValueError(f"Последовательность длины {seq_len} не помещается в 64-битный код.")
+    count = max(len(indices) - seq_len + 1, 0)
+    codes = np.zeros(count, dtype=np.int64)
+    for offset in range(seq_len):
+        codes *= radix
+        codes += indices[offset:offset + count]
+    # Коды из 16 бит сортируются поразрядной сортировкой за линейное время
+    if radix ** seq_len <= 1 << 16:
+        return codes.astype(np.uint16)
+    return codes
+
+def repeated_distances(indices, seq_len, radix=None):
+    """
+    Находит расстояния между соседними повторениями каждой n-граммы.
+
+    :param indices: Массив индексов алфавита.
+    :param seq_len: Длина n-граммы.
+    :param radix: Размер алфавита (по умолчанию max(indices) + 1).
+    :return: Массив расстояний.
+    """
+    if len(indices) - seq_len + 1 < 2:
+        return np.empty(0, dtype=np.int64)
+    if radix is None:
+        radix = int(indices.max()) + 1
+    codes = ngram_codes(indices, seq_len, radix)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    repeated = sorted_codes[1:] == sorted_codes[:-1]
+    return order[1:][repeated] - order[:-1][repeated]
+
+def factor_counts(distances, max_period):
+    """
+    Для каждого периода 1..max_period считает, сколько расстояний на него
+    делится. Делимость проверяется по уникальным расстояниям с весами,
+    поэтому гистограмма ограничена размером max_period + 1.
+
+    :param distances: Массив расстояний.
+    :param max_period: Наибольший проверяемый период.
+    :return: Массив counts, где counts[p] — число расстояний, кратных p.
+    """
+    counts = np.zeros(max_period + 1, dtype=np.int64)
+    if not len(distances):
+        return counts
+    values, weights = np.unique(distances, return_counts=True)
+    for period in range(1, max_period + 1):
+        counts[period] = weights[values % period == 0].sum()
+    return counts
+
+def column_histograms(indices, key_length, alphabet_size):
+    """
+    Строит гистограммы букв всех столбцов одним вызовом np.bincount.
+    Полные строки массива индексов переформатируются в матрицу
+    (строки x key_length), к индексам прибавляется смещение столбца;
+    неполная последняя строка добавляется отдельно.
+
+    :param indices: Массив индексов алфавита.
+    :param key_length: Длина ключа (количество столбцов).
+    :param alphabet_size: Размер алфавита.
+    :return: Матрица частот формы (key_length, alphabet_size).
+    """
+    rows = len(indices) // key_length
+    full = indices[:rows * key_length].reshape(rows, key_length)
+    offsets = np.arange(key_length, dtype=np.intp) * alphabet_size
+    counts = np.bincount((full + offsets).ravel(), minlength=key_length * alphabet_size)
+    counts = counts.reshape(key_length, alphabet_size)
+    tail = indices[rows * key_length:]
+    counts[np.arange(len(tail)), tail] += 1
+    return counts
+
+def average_ic(indices, period, alphabet_size):
+    """
+    Средний индекс совпадения столбцов текста при заданном периоде.
+
+    :param indices: Массив индексов алфавита.
+    :param period: Период (длина ключа).
+    :param alphabet_size: Размер алфавита.
+    :return: Средний индекс совпадения.
+    """
+    counts = column_histograms(indices, period, alphabet_size).astype(np.float64)
+    totals = counts.sum(axis=1)
+    pairs = totals * (totals - 1)
+    valid = pairs > 0
+    if not valid.any():
+        return 0.0
+    return float(((counts * (counts - 1)).sum(axis=1)[valid] / pairs[valid]).mean())
+
+@instrumented(size_arg=0)
+def estimate_key_length(indices, alphabet_size=33, max_period=40, seq_len=3, language_ic=RUSSIAN_IC):
+    """
+    Ранжирует периоды 1..max_period по совокупности признаков Касиски и
+    Фридмана. Время работы линейно по длине текста.
+
+    Доля Касиски — насколько чаще случайного (1/p) расстояния между
+    повторами делятся на p. Доля Фридмана — положение среднего индекса
+    совпадения между случайным текстом (1/m) и языком (language_ic).
+    Обе доли лежат в [0, 1]; уверенность = IC * (1 + Касиски) / 2.
+
+    :param indices: Массив индексов алфавита.
+    :param alphabet_size: Размер алфавита.
+    :param max_period: Наибольший проверяемый период.
+    :param seq_len: Длина n-грамм для метода Касиски.
+    :param language_ic: Индекс совпадения открытого текста.
+    :return: Список пар (период, уверенность), по убыванию уверенности.
+    """
+    max_period = max(1, min(max_period, len(indices) // 2))
+    distances = repeated_distances(indices, seq_len, alphabet_size)
+    counts = factor_counts(distances, max_period)
+
+    random_ic = 1 / alphabet_size
+    ranking = []
+    for period in range(1, max_period + 1):
+        if period == 1 or not len(distances):
+            kasiski = 1.0 if len(distances) else 0.0
+        else:
+            chance = 1 / period
+            kasiski = (counts[period] / len(distances) - chance) / (1 - chance)
+        ic = (average_ic(indices, period, alphabet_size) - random_ic) / (language_ic - random_ic)
+        kasiski = min(max(kasiski, 0.0), 1.0)
+        ic = min(max(ic, 0.0), 1.0)
+        ranking.append((period, float(ic * (1 + kasiski) / 2)))
+    ranking.sort(key=lambda item: (-item[1], item[0]))
+    return ranking
@@ -0,0 +1,109 @@
+# monoalphabetic.py
+
+import math
+
+from alphabet import LATIN, as_alphabet
+from key_cache import KEY_CACHE
+
+ALPHABET = LATIN.letters
+
+def compile_table(source, target):
+    """
+    Компилирует таблицу замены для str.translate. Заглавные буквы
+    заменяются заглавными (используется при сохранении регистра).
+
+    :param source: Буквы открытого алфавита.
+    :param target: Буквы, на которые они заменяются (в том же порядке).
+    :return: Таблица для str.translate. Символы вне source не изменяются.
+    """
+    if len(source) != len(target):
+        raise ValueError("Алфавиты замены должны иметь одинаковую длину.")
+    return compile_mapping(dict(zip(source, target)))
+
+def compile_mapping(mapping):
+    """
+    Компилирует словарь подстановки {буква: буква} в таблицу для str.translate.
+
+    :param mapping: Словарь подстановки.
+    :return: Таблица для str.translate.
+    """
+    table = str.maketrans({k.upper(): v.upper() for k, v in mapping.items()})
+    table.update(str.maketrans(mapping))
+    return table
+
+def shift_table(shift, alphabet=LATIN):
+    """
+    Таблица сдвига алфавита (шифр Цезаря). Строится один раз для каждого
+    сдвига и хранится в KEY_CACHE.
+
+    :param shift: Сдвиг (целое число).
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Таблица для str.translate.
+    """
+    alphabet = as_alphabet(alphabet)
+    shift %= len(alphabet)
+    return KEY_CACHE.get_or_build('caesar', shift, alphabet, _build_shift_table, shift, alphabet.letters)
+
+def _build_shift_table(shift, letters):
+    return compile_table(letters, letters[shift:] + letters[:shift])
+
+def affine_table(a, b, alphabet=LATIN):
+    """
+    Таблица аффинного преобразования x -> (a * x + b) mod m (хранится в KEY_CACHE).
+
+    :param a: Коэффициент a.
+    :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Таблица для str.translate.
+    """
+    alphabet = as_alphabet(alphabet)
+    m = len(alphabet)
+    return KEY_CACHE.get_or_build('affine', (a % m, b % m), alphabet, _build_affine_table, a, b, alphabet.letters)
+
+def _build_affine_table(a, b, letters):
+    m = len(letters)
+    return compile_table(letters, ''.join(letters[(a * x + b) % m] for x in range(m)))
+
+def affine_inverse_table(a, b, alphabet=LATIN):
+    """
+    Таблица обратного аффинного преобразования y -> a_inv * (y - b) mod m
+    (хранится в KEY_CACHE). Обратимость a проверяется один раз, при
+    построении таблицы.
+
+    :param a: Коэффициент a (должен быть взаимно простым с m).
+    :param b: Коэффициент b.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :return: Таблица для str.translate.
+    """
+    alphabet = as_alphabet(alphabet)
+    m = len(alphabet)
+    return KEY_CACHE.get_or_build('affine_inverse', (a % m, b % m), alphabet, _build_affine_inverse_table,
+                                  a, b, alphabet)
+
+def _build_affine_inverse_table(a, b, alphabet):
+    m = len(alphabet)
+    if math.gcd(a, m) != 1:
+        raise ValueError(f"Обратный элемент для a={a} по модулю m={m} не существует.")
+    return invert_table(affine_table(a, b, alphabet))
+
+def invert_table(table):
+    """
+    Строит обратную таблицу замены.
+
+    :param table: Таблица, полученная из compile_table/compile_mapping.
+    :return: Обратная таблица для str.translate.
+    """
+    return {v if isinstance(v, int) else ord(v): k for k, v in table.items()}
+
+def translate(text, table, preserve_case=False):
+    """
+    Применяет одноалфавитную замену ко всему тексту за один проход.
+    Символы вне алфавита не изменяются.
+
+    :param text: Входной текст.
+    :param table: Таблица замены.
+    :param preserve_case: Сохранять регистр букв; по умолчанию текст
+                          приводится к нижнему регистру.
+    :return: Преобразованный текст.
+    """
+    return text.translate(table) if preserve_case else text.lower().translate(table)
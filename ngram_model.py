@@ -0,0 +1,311 @@
+# ngram_model.py
+#
+# Языковая модель на n-граммах — функция оценки кандидатов при
+# криптоанализе. Для каждого порядка k = 1..order хранится плотная таблица
+# log10 P(последняя буква | предыдущие k - 1 букв), индексируемая
+# упакованным кодом k-граммы (схема Горнера, как в keylength.ngram_codes).
+# Вероятности высших порядков интерполируются с низшими по Виттену — Беллу,
+# поэтому ни одна n-грамма не получает нулевую вероятность.
+#
+# Обученные таблицы сохраняются в плоский двоичный файл (заголовок и
+# таблицы float32 подряд), который открывается через mmap без разбора,
+# поэтому короткоживущие процессы-исполнители загружают модель мгновенно.
+#
+# Пример:
+#     python ngram_model.py build --language russian --corpus war_and_peace.txt
+#     python ngram_model.py score --language english "attack at dawn"
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+from alphabet import LATIN, RUSSIAN, as_alphabet
+from keylength import ngram_codes
+
+# Каталог с обучающими текстами
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Каталог собранных моделей (не хранится в репозитории)
+CACHE_DIR = os.environ.get('NGRAM_CACHE_DIR', os.path.join(DATA_DIR, 'cache'))
+
+# Язык -> (алфавит, файл обучающего текста)
+CORPORA = {
+    'english': (LATIN, 'english.txt'),
+    'russian': (RUSSIAN, 'russian.txt'),
+}
+
+# Порядок модели по умолчанию (квадграммы)
+DEFAULT_ORDER = 4
+
+# Заголовок файла модели: сигнатура, версия формата, порядок, длина
+# алфавита в байтах UTF-8, размер и время изменения обучающего текста
+FILE_MAGIC = b'NGRM'
+FILE_VERSION = 1
+HEADER = struct.Struct('<4sIIIqq')
+
+# Выравнивание начала таблиц в файле (в байтах)
+TABLE_ALIGNMENT = 64
+
+class NgramModel:
+    """
+    Набор таблиц логарифмических вероятностей n-грамм одного алфавита.
+    tables[k - 1] — таблица порядка k длины len(alphabet) ** k.
+    """
+
+    def __init__(self, alphabet, tables):
+        self.alphabet = as_alphabet(alphabet)
+        self.tables = list(tables)
+        self.order = len(self.tables)
+        self.lookup = self.alphabet.lookup
+
+    def encode(self, text):
+        """
+        Переводит текст в массив индексов алфавита модели, отбрасывая
+        символы вне алфавита.
+        """
+        return self.alphabet.encode(text)
+
+    def score(self, indices):
+        """
+        Логарифм (по основанию 10) вероятности последовательности букв:
+        первые order - 1 букв оцениваются таблицами низших порядков,
+        остальные — таблицей старшего порядка за одну векторную выборку.
+        Матрица индексов оценивается построчно за те же векторные операции.
+
+        :param indices: Массив индексов алфавита (одномерный или матрица
+                        кандидатов одинаковой длины).
+        :return: Сумма логарифмических вероятностей (для матрицы — массив
+                 сумм по строкам).
+        """
+        indices = np.asarray(indices)
+        batch = np.atleast_2d(indices)
+        radix = len(self.alphabet)
+        length = batch.shape[1]
+        totals = np.zeros(len(batch), dtype=np.float64)
+        for k in range(1, min(length, self.order - 1) + 1):
+            totals += self.tables[k - 1][_row_codes(batch[:, :k], radix)[:, 0]]
+        if length >= self.order:
+            codes = _row_codes(batch, radix, self.order)
+            totals += self.tables[-1][codes].sum(axis=1, dtype=np.float64)
+        return float(totals[0]) if indices.ndim == 1 else totals
+
+    def mean_score(self, indices):
+        """
+        Средняя логарифмическая вероятность на букву (сравнима для текстов
+        разной длины). Для пустого текста возвращает -inf.
+        """
+        if not len(indices):
+            return float('-inf')
+        return self.score(indices) / len(indices)
+
+def _row_codes(batch, radix, order=None):
+    """
+    Упакованные коды n-грамм каждой строки матрицы индексов (схема Горнера
+    над сдвинутыми срезами столбцов). По умолчанию order — ширина матрицы.
+    """
+    order = order or batch.shape[1]
+    count = batch.shape[1] - order + 1
+    codes = np.zeros((len(batch), count), dtype=np.int64)
+    for offset in range(order):
+        codes *= radix
+        codes += batch[:, offset:offset + count]
+    return codes
+
+def _count_ngrams(indices, order, radix):
+    """
+    Гистограмма упакованных кодов n-грамм порядка order.
+    """
+    return np.bincount(ngram_codes(indices, order, radix), minlength=radix ** order)
+
+def train_model(indices, alphabet, order=DEFAULT_ORDER):
+    """
+    Обучает модель на массиве индексов алфавита.
+
+    Для порядка k вероятность продолжения x после контекста h равна
+    lambda(h) * c(hx) / c(h) + (1 - lambda(h)) * P(x | суффикс h), где
+    lambda(h) = c(h) / (c(h) + T(h)) и T(h) — число различных
+    продолжений h (интерполяция Виттена — Белла). Все порядки
+    вычисляются целиком над плотными массивами.
+
+    :param indices: Массив индексов алфавита (обучающий текст).
+    :param alphabet: Алфавит.
+    :param order: Наибольший порядок n-грамм.
+    :return: NgramModel.
+    """
+    radix = len(alphabet)
+    if len(indices) < order:
+        raise ValueError("Обучающий текст слишком короткий.")
+    unigrams = np.bincount(indices, minlength=radix).astype(np.float64)
+    # Сглаживание униграмм равномерным распределением
+    lower = (unigrams + 1) / (unigrams.sum() + radix)
+    tables = [np.log10(lower).astype(np.float32)]
+    for k in range(2, order + 1):
+        counts = _count_ngrams(indices, k, radix).astype(np.float64).reshape(-1, radix)
+        context = counts.sum(axis=1, keepdims=True)
+        types = np.count_nonzero(counts, axis=1)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(context > 0, context / (context + types), 0.0)
+            maximum_likelihood = np.where(context > 0, counts / context, 0.0)
+        # Суффикс контекста — последние k - 2 буквы плюс продолжение,
+        # то есть код (k - 1)-граммы по модулю radix ** (k - 1)
+        backoff = lower.reshape(-1, radix)[np.arange(len(counts)) % (radix ** (k - 2))]
+        lower = (weight * maximum_likelihood + (1 - weight) * backoff).ravel()
+        tables.append(np.log10(lower).astype(np.float32))
+    return NgramModel(alphabet, tables)
+
+def _source_stamp(path):
+    """
+    Размер и время изменения обучающего текста — по ним определяется,
+    устарел ли собранный файл модели.
+    """
+    if path is None:
+        return 0, 0
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
+
+def _tables_offset(alphabet_size):
+    return -(-(HEADER.size + alphabet_size) // TABLE_ALIGNMENT) * TABLE_ALIGNMENT
+
+def save_model(model, path, source=None):
+    """
+    Сохраняет модель в плоский двоичный файл. Запись атомарна: файл
+    сначала пишется во временный и затем переименовывается.
+
+    :param model: NgramModel.
+    :param path: Путь к файлу модели.
+    :param source: Путь к обучающему тексту (его размер и время изменения
+                   записываются в заголовок).
+    """
+    alphabet = str(model.alphabet).encode('utf-8')
+    size, mtime = _source_stamp(source)
+    header = HEADER.pack(FILE_MAGIC, FILE_VERSION, model.order, len(alphabet), size, mtime) + alphabet
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(header.ljust(_tables_offset(len(alphabet)), b'\0'))
+        for table in model.tables:
+            file.write(np.ascontiguousarray(table, dtype='<f4').tobytes())
+    os.replace(temp_path, path)
+
+def open_model(path, source=None):
+    """
+    Открывает файл модели через mmap. Таблицы — представления numpy над
+    отображенной памятью, поэтому загрузка не читает и не разбирает файл,
+    а страницы разделяются между процессами.
+
+    :param path: Путь к файлу модели.
+    :param source: Путь к обучающему тексту; если он изменился после
+                   сборки модели, возбуждается ValueError.
+    :return: NgramModel.
+    """
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"Файл {path} не является моделью n-грамм.")
+    magic, version, order, alphabet_size, size, mtime = HEADER.unpack_from(buffer)
+    if magic != FILE_MAGIC or version != FILE_VERSION:
+        raise ValueError(f"Файл {path} не является моделью n-грамм версии {FILE_VERSION}.")
+    if source is not None and (size, mtime) != _source_stamp(source):
+        raise ValueError(f"Модель {path} собрана по другой версии текста {source}.")
+    alphabet = bytes(buffer[HEADER.size:HEADER.size + alphabet_size]).decode('utf-8')
+    radix = len(alphabet)
+    offset = _tables_offset(alphabet_size)
+    expected = offset + 4 * sum(radix ** k for k in range(1, order + 1))
+    if len(buffer) != expected:
+        raise ValueError(f"Файл модели {path} поврежден.")
+    tables = []
+    for k in range(1, order + 1):
+        tables.append(np.frombuffer(buffer, dtype='<f4', count=radix ** k, offset=offset))
+        offset += 4 * radix ** k
+    return NgramModel(alphabet, tables)
+
+def build_model(corpus, alphabet, order=DEFAULT_ORDER, path=None):
+    """
+    Обучает модель по текстовому файлу и, если задан path, сохраняет ее.
+
+    :param corpus: Путь к обучающему тексту (UTF-8).
+    :param alphabet: Алфавит.
+    :param order: Наибольший порядок n-грамм.
+    :param path: Путь к файлу модели (или None).
+    :return: NgramModel.
+    """
+    with open(corpus, 'r', encoding='utf-8') as file:
+        indices = as_alphabet(alphabet).encode(file.read())
+    model = train_model(indices, alphabet, order)
+    if path:
+        save_model(model, path, corpus)
+    return model
+
+def model_path(language, order=DEFAULT_ORDER):
+    """
+    Путь к собранной модели языка в каталоге CACHE_DIR.
+    """
+    return os.path.join(CACHE_DIR, f"{language}.{order}.ngram")
+
+@lru_cache(maxsize=None)
+def load_model(language='english', order=DEFAULT_ORDER):
+    """
+    Возвращает модель языка: открывает собранный файл из CACHE_DIR через
+    mmap, а если его нет или обучающий текст изменился — собирает модель
+    по тексту из каталога data и сохраняет в CACHE_DIR. Если каталог
+    недоступен для записи, модель используется без сохранения.
+
+    :param language: Язык из CORPORA.
+    :param order: Наибольший порядок n-грамм.
+    :return: NgramModel.
+    """
+    if language not in CORPORA:
+        raise ValueError(f"Неизвестный язык: {language}")
+    alphabet, filename = CORPORA[language]
+    corpus = os.path.join(DATA_DIR, filename)
+    path = model_path(language, order)
+    try:
+        return open_model(path, corpus)
+    except (OSError, ValueError):
+        pass
+    model = build_model(corpus, alphabet, order)
+    try:
+        save_model(model, path, corpus)
+    except OSError:
+        pass
+    return model
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Языковая модель на n-граммах")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Собрать файл модели")
+    build.add_argument('--language', choices=sorted(CORPORA), required=True)
+    build.add_argument('--corpus', default=None, help="Обучающий текст (по умолчанию из каталога data)")
+    build.add_argument('--order', type=int, default=DEFAULT_ORDER)
+    build.add_argument('--out', default=None, help="Файл модели (по умолчанию в каталоге кэша)")
+    score = commands.add_parser('score', help="Оценить текст")
+    score.add_argument('--language', choices=sorted(CORPORA), default='english')
+    score.add_argument('text')
+    args = parser.parse_args(argv)
+
+    if args.command == 'score':
+        model = load_model(args.language)
+        print(f"{model.mean_score(model.encode(args.text)):.4f}")
+        return 0
+
+    alphabet, filename = CORPORA[args.language]
+    corpus = args.corpus or os.path.join(DATA_DIR, filename)
+    path = args.out or model_path(args.language, args.order)
+    try:
+        model = build_model(corpus, alphabet, args.order, path)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    sizes = ', '.join(str(len(table)) for table in model.tables)
+    print(f"Модель {args.language} порядка {model.order} ({sizes}) сохранена в {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
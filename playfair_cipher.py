@@ -1,19 +1,61 @@
 # playfair_cipher.py
 
-def generate_playfair_matrix(key):
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import combinations, islice
+
+import numpy as np
+
+from alphabet import PLAYFAIR, as_alphabet
+from instrumentation import instrumented
+from key_cache import KEY_CACHE
+from ngram_model import load_model
+
+# Количество биграмм, шифруемых за один шаг потокового режима
+STREAM_BLOCK_PAIRS = 1 << 15
+
+# Порядок n-грамм, по которым оценивается ключ при взломе
+CRACK_ORDER = 4
+
+# Вероятность выбрать при отжиге перестановку строк или столбцов,
+# транспонирование или отражение квадрата вместо обмена двух клеток
+GLOBAL_MOVE_PROBABILITY = 0.1
+
+# Наибольшее количество кандидатов, оцениваемых одним вызовом numpy
+CRACK_BATCH_SIZE = 64
+
+def _square_side(alphabet):
+    side = math.isqrt(len(alphabet))
+    if side * side != len(alphabet):
+        raise ValueError(f"Размер алфавита Плейфера должен быть квадратом: {len(alphabet)}.")
+    return side
+
+def _filler(alphabet):
+    # Буква, которой разделяются повторы и дополняется непарная буква
+    return 'x' if 'x' in alphabet.letters else alphabet.letters[-1]
+
+def generate_playfair_matrix(key, alphabet=PLAYFAIR):
     """
     Генерирует матрицу Плейфера на основе ключа.
     
     :param key: Ключевое слово.
-    :return: 5x5 матрица Плейфера.
+    :param alphabet: Алфавит квадратного размера (по умолчанию 25 букв,
+                     'j' объединяется с 'i').
+    :return: Квадратная матрица Плейфера (5x5 для алфавита по умолчанию).
     """
-    alphabet = 'abcdefghiklmnopqrstuvwxyz'  # 'j' обычно объединяется с 'i'
-    key = key.lower().replace('j', 'i')
+    alphabet = as_alphabet(alphabet)
+    side = _square_side(alphabet)
+    key = alphabet.normalize(key)
     matrix = []
     seen = set()
 
     for char in key:
-        if char in alphabet and char not in seen:
+        if char in alphabet.letters and char not in seen:
             matrix.append(char)
             seen.add(char)
 
@@ -21,7 +63,7 @@ def generate_playfair_matrix(key):
         if char not in seen:
             matrix.append(char)
 
-    return [matrix[i*5:(i+1)*5] for i in range(5)]
+    return [matrix[i*side:(i+1)*side] for i in range(side)]
 
 def find_position(matrix, char):
     """
@@ -31,13 +73,13 @@ def find_position(matrix, char):
     :param char: Символ для поиска.
     :return: Кортеж (row, col).
     """
-    for row in range(5):
-        for col in range(5):
+    for row in range(len(matrix)):
+        for col in range(len(matrix)):
             if matrix[row][col] == char:
                 return (row, col)
     return None
 
-def playfair_prepare_text(text):
+def playfair_prepare_text(text, alphabet=PLAYFAIR):
     """
     Подготавливает текст для шифрования:
     - Удаляет неалфавитные символы.
@@ -45,89 +87,355 @@ def playfair_prepare_text(text):
     - Делит на биграммы, добавляя 'x' при необходимости.
     
     :param text: Входной текст.
+    :param alphabet: Алфавит Плейфера.
     :return: Список биграмм.
     """
-    text = text.lower().replace('j', 'i')
-    text = ''.join([c for c in text if c.isalpha()])
-    prepared = []
-    i = 0
-    while i < len(text):
-        a = text[i]
-        b = 'x'
-        if i + 1 < len(text):
-            b = text[i + 1]
-            if a == b:
-                b = 'x'
-                i += 1
+    return list(playfair_prepare_stream([text], alphabet))
+
+def playfair_prepare_stream(chunks, alphabet=PLAYFAIR):
+    """
+    Потоковый вариант playfair_prepare_text. Незавершенная биграмма
+    переносится через границу фрагментов, поэтому результат совпадает
+    с подготовкой всего текста целиком.
+    
+    :param chunks: Итерируемый набор фрагментов текста.
+    :param alphabet: Алфавит Плейфера.
+    :return: Генератор биграмм.
+    """
+    alphabet = as_alphabet(alphabet)
+    filler = _filler(alphabet)
+    pending = None
+    for chunk in chunks:
+        chunk = alphabet.normalize(chunk)
+        for c in chunk:
+            if not (c.isalpha() or c in alphabet.letters):
+                continue
+            if pending is None:
+                pending = c
+            elif pending == c:
+                yield pending + filler
             else:
-                i += 2
-        else:
-            i += 1
-        prepared.append(a + b)
-    return prepared
+                yield pending + c
+                pending = None
+    if pending is not None:
+        yield pending + filler
+
+def _transform_pair(matrix, positions, a, b, step):
+    """
+    Шифрует (step=1) или расшифровывает (step=-1) одну биграмму.
+    """
+    row_a, col_a = positions[a]
+    row_b, col_b = positions[b]
+    side = len(matrix)
+
+    if row_a == row_b:
+        return matrix[row_a][(col_a + step) % side] + matrix[row_b][(col_b + step) % side]
+    elif col_a == col_b:
+        return matrix[(row_a + step) % side][col_a] + matrix[(row_b + step) % side][col_b]
+    else:
+        return matrix[row_a][col_b] + matrix[row_b][col_a]
+
+PlayfairKey = namedtuple('PlayfairKey', ['matrix', 'positions', 'encrypt_table', 'decrypt_table'])
+PlayfairKey.__doc__ = """
+Скомпилированный ключ Плейфера: матрица, позиции букв {буква: (row, col)}
+и таблицы всех биграмм (625 для алфавита по умолчанию) для шифрования и расшифровки.
+"""
+
+def normalize_playfair_key(key, alphabet=PLAYFAIR):
+    """
+    Приводит ключ к порядку букв в матрице. Ключи, дающие
+    одинаковую матрицу, нормализуются одинаково.
+    
+    :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
+    :return: Строка из букв матрицы по строкам.
+    """
+    return ''.join(char for row in generate_playfair_matrix(key, alphabet) for char in row)
+
+def _compile_square(square):
+    side = math.isqrt(len(square))
+    matrix = [list(square[i*side:(i+1)*side]) for i in range(side)]
+    positions = {char: divmod(idx, side) for idx, char in enumerate(square)}
+    encrypt_table = {}
+    decrypt_table = {}
+    for a in square:
+        for b in square:
+            encrypt_table[a + b] = _transform_pair(matrix, positions, a, b, 1)
+            decrypt_table[a + b] = _transform_pair(matrix, positions, a, b, -1)
+    return PlayfairKey(matrix, positions, encrypt_table, decrypt_table)
+
+def compile_playfair_key(key, alphabet=PLAYFAIR):
+    """
+    Компилирует ключ Плейфера. Таблицы хранятся в KEY_CACHE по
+    нормализованному ключу, а нормализованный ключ — по исходной строке,
+    поэтому повторные вызовы не строят матрицу и таблицы заново.
+    
+    :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
+    :return: PlayfairKey.
+    """
+    alphabet = as_alphabet(alphabet)
+    square = KEY_CACHE.get_or_build('playfair_square', key, alphabet, normalize_playfair_key, key, alphabet)
+    return KEY_CACHE.get_or_build('playfair', square, alphabet, _compile_square, square)
+
+def _lookup(table, pairs):
+    try:
+        return ''.join([table[pair] for pair in pairs])
+    except KeyError as e:
+        raise ValueError(f"Недопустимая биграмма: {e}")
 
-def playfair_encrypt(plaintext, key):
+@instrumented(size_arg=0)
+def playfair_encrypt(plaintext, key, alphabet=PLAYFAIR):
     """
     Шифрует текст методом Плейфера.
     
     :param plaintext: Открытый текст.
     :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
     :return: Зашифрованный текст.
     """
-    matrix = generate_playfair_matrix(key)
-    prepared_text = playfair_prepare_text(plaintext)
-    ciphertext = ''
-
-    for pair in prepared_text:
-        a, b = pair
-        row_a, col_a = find_position(matrix, a)
-        row_b, col_b = find_position(matrix, b)
-
-        if row_a == row_b:
-            ciphertext += matrix[row_a][(col_a + 1) % 5]
-            ciphertext += matrix[row_b][(col_b + 1) % 5]
-        elif col_a == col_b:
-            ciphertext += matrix[(row_a + 1) % 5][col_a]
-            ciphertext += matrix[(row_b + 1) % 5][col_b]
-        else:
-            ciphertext += matrix[row_a][col_b]
-            ciphertext += matrix[row_b][col_a]
-
-    return ciphertext
+    return ''.join(playfair_encrypt_stream([plaintext], key, alphabet))
 
-def playfair_decrypt(ciphertext, key):
+@instrumented(size_arg=0)
+def playfair_decrypt(ciphertext, key, alphabet=PLAYFAIR):
     """
     Расшифровывает текст методом Плейфера.
     
     :param ciphertext: Зашифрованный текст.
     :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
     :return: Расшифрованный текст.
     """
-    matrix = generate_playfair_matrix(key)
-    prepared_text = [ciphertext[i:i+2] for i in range(0, len(ciphertext), 2)]
-    plaintext = ''
-
-    for pair in prepared_text:
-        a, b = pair
-        row_a, col_a = find_position(matrix, a)
-        row_b, col_b = find_position(matrix, b)
-
-        if row_a == row_b:
-            plaintext += matrix[row_a][(col_a - 1) % 5]
-            plaintext += matrix[row_b][(col_b - 1) % 5]
-        elif col_a == col_b:
-            plaintext += matrix[(row_a - 1) % 5][col_a]
-            plaintext += matrix[(row_b - 1) % 5][col_b]
+    return ''.join(playfair_decrypt_stream([ciphertext], key, alphabet))
+
+def playfair_encrypt_stream(chunks, key, alphabet=PLAYFAIR):
+    """
+    Потоково шифрует текст методом Плейфера.
+    
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    table = compile_playfair_key(key, alphabet).encrypt_table
+    pairs = playfair_prepare_stream(chunks, alphabet)
+    while True:
+        block = list(islice(pairs, STREAM_BLOCK_PAIRS))
+        if not block:
+            break
+        yield _lookup(table, block)
+
+def playfair_decrypt_stream(chunks, key, alphabet=PLAYFAIR):
+    """
+    Потоково расшифровывает текст методом Плейфера. Как и при
+    шифровании, регистр не учитывается, а символы вне алфавита
+    (пробелы, переводы строк) отбрасываются. Непарная последняя буква
+    фрагмента переносится в следующий фрагмент.
+    
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param key: Ключевое слово.
+    :param alphabet: Алфавит Плейфера.
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    alphabet = as_alphabet(alphabet)
+    table = compile_playfair_key(key, alphabet).decrypt_table
+    carry = ''
+    for chunk in chunks:
+        chunk = carry + alphabet.decode(alphabet.encode(chunk))
+        even = len(chunk) - len(chunk) % 2
+        carry = chunk[even:]
+        yield _lookup(table, [chunk[i:i + 2] for i in range(0, even, 2)])
+    if carry:
+        # Текст с нечетным количеством букв нельзя разбить на биграммы
+        raise ValueError(f"Шифртекст содержит нечетное количество букв (последняя: '{carry}').")
+
+@lru_cache(maxsize=None)
+def _crack_tables(side):
+    """
+    Таблицы отжига для квадрата side x side, не зависящие от ключа.
+
+    cells[a * size + b] — пара клеток, в которые расшифровывается биграмма,
+    стоящая в клетках (a, b) (правило той же строки, того же столбца или
+    прямоугольника). moves — перестановки клеток квадрата: сначала все
+    обмены двух клеток (их swaps штук), затем обмены строк и столбцов,
+    транспонирование, поворот на 180 градусов и отражения.
+
+    :return: Тройка (cells, moves, swaps).
+    """
+    size = side * side
+    row, col = np.divmod(np.arange(size), side)
+    row_a, row_b = np.repeat(row, size), np.tile(row, size)
+    col_a, col_b = np.repeat(col, size), np.tile(col, size)
+    same_row = row_a == row_b
+    same_col = (col_a == col_b) & ~same_row
+    cells = np.stack([
+        np.where(same_col, (row_a - 1) % side, row_a) * side
+        + np.where(same_row, (col_a - 1) % side, np.where(same_col, col_a, col_b)),
+        np.where(same_col, (row_b - 1) % side, row_b) * side
+        + np.where(same_row, (col_b - 1) % side, np.where(same_col, col_b, col_a)),
+    ], axis=1)
+
+    identity = np.arange(size).reshape(side, side)
+    moves = []
+    for i, j in combinations(range(size), 2):
+        move = np.arange(size)
+        move[[i, j]] = j, i
+        moves.append(move)
+    swaps = len(moves)
+    for i, j in combinations(range(side), 2):
+        move = identity.copy()
+        move[[i, j]] = move[[j, i]]
+        moves.append(move.ravel())
+        move = identity.copy()
+        move[:, [i, j]] = move[:, [j, i]]
+        moves.append(move.ravel())
+    moves += [identity.T.ravel(), identity.ravel()[::-1], identity[::-1].ravel(), identity[:, ::-1].ravel()]
+    return cells, np.array(moves), swaps
+
+def _square_scorer(digraphs, table, radix, letters, side):
+    """
+    Функция оценки пакета квадратов (массив K x size индексов букв).
+
+    Для каждого кандидата один раз строится таблица расшифровки биграмм —
+    только для различных биграмм шифртекста (не больше size**2), — и текст
+    расшифровывается через нее, без поиска позиций букв. Оценка — сумма
+    логарифмических вероятностей n-грамм открытого текста.
+
+    :param digraphs: Коды биграмм шифртекста (a * size + b).
+    :param table: Таблица модели порядка CRACK_ORDER.
+    :param radix: Размер алфавита модели.
+    :param letters: Индекс буквы модели для каждой буквы алфавита Плейфера.
+    """
+    size = side * side
+    cells, _, _ = _crack_tables(side)
+    unique, inverse = np.unique(digraphs, return_inverse=True)
+    first, second = np.divmod(unique, size)
+
+    def score(squares):
+        count = len(squares)
+        positions = np.argsort(squares, axis=1)
+        pairs = cells[positions[:, first] * size + positions[:, second]].reshape(count, -1)
+        decrypted = np.take_along_axis(letters[squares], pairs, axis=1).reshape(count, -1, 2)
+        plain = decrypted[:, inverse].reshape(count, -1)
+        codes = plain[:, :1 - CRACK_ORDER].copy()
+        for offset in range(1, CRACK_ORDER):
+            codes *= radix
+            codes += plain[:, offset:plain.shape[1] - CRACK_ORDER + 1 + offset]
+        return table[codes].sum(axis=1, dtype=np.float64)
+
+    return score
+
+def _anneal(digraphs, table, radix, letters, side, iterations, temperature, seed):
+    """
+    Один запуск отжига из случайного квадрата. Кандидаты оцениваются
+    пакетами: из пакета принимается первый кандидат, прошедший проверку
+    Метрополиса, и счетчик итераций увеличивается на его номер, как если
+    бы кандидаты проверялись по одному. Размер пакета подстраивается под
+    долю принятых ходов (при высокой температуре пакеты короче).
+
+    :param temperature: Начальная температура (0 — восхождение к вершине);
+                        температура линейно снижается до нуля.
+    :return: Тройка (квадрат, оценка, выполненные итерации).
+    """
+    rng = np.random.default_rng(seed)
+    score = _square_scorer(digraphs, table, radix, letters, side)
+    _, moves, swaps = _crack_tables(side)
+    square = rng.permutation(side * side)
+    current = score(square[None])[0]
+    best, best_square = current, square
+    rate = 1.0
+    step = 0
+    while step < iterations:
+        count = int(min(CRACK_BATCH_SIZE, max(2, 2 / rate)))
+        chosen = np.where(rng.random(count) < GLOBAL_MOVE_PROBABILITY,
+                          rng.integers(swaps, len(moves), count), rng.integers(0, swaps, count))
+        candidates = square[moves[chosen]]
+        scores = score(candidates)
+        heat = temperature * max(0.0, 1 - step / iterations)
+        if heat > 0:
+            accepted = scores - current >= heat * np.log(rng.random(count))
         else:
-            plaintext += matrix[row_a][col_b]
-            plaintext += matrix[row_b][col_a]
+            accepted = scores >= current
+        if not accepted.any():
+            step += count
+            rate = 0.9 * rate + 0.05 / count
+            continue
+        index = int(accepted.argmax())
+        step += index + 1
+        rate = 0.9 * rate + 0.1 / (index + 1)
+        square, current = candidates[index], scores[index]
+        if current > best:
+            best, best_square = current, square
+    return best_square, float(best), step
+
+_worker_state = {}
+
+def _init_worker(*args):
+    _worker_state['args'] = args
 
-    return plaintext
+def _anneal_in_worker(seed):
+    return _anneal(*_worker_state['args'], seed)
+
+@instrumented(size_arg=0)
+def playfair_crack(ciphertext, restarts=8, iterations=1000000, temperature=10.0,
+                   model=None, alphabet=PLAYFAIR, workers=None, seed=None):
+    """
+    Подбирает квадрат Плейфера отжигом по квадграммной модели. Ходы —
+    обмен двух клеток, реже обмен строк или столбцов, транспонирование и
+    отражения квадрата. Перезапуски распределяются по процессам.
+
+    :param ciphertext: Зашифрованный текст (небуквенные символы пропускаются).
+    :param restarts: Количество перезапусков.
+    :param iterations: Количество итераций в одном перезапуске.
+    :param temperature: Начальная температура отжига (0 — восхождение к вершине).
+    :param model: NgramModel (по умолчанию английская модель); все буквы
+                  алфавита Плейфера должны входить в алфавит модели.
+    :param alphabet: Алфавит Плейфера.
+    :param workers: Количество процессов (по умолчанию — число ядер,
+                    но не больше числа перезапусков).
+    :param seed: Начальное значение генератора случайных чисел.
+    :return: Четверка (квадрат — строка букв по строкам, средняя оценка на
+             букву, открытый текст, итераций в секунду по всем перезапускам).
+    """
+    model = model or load_model()
+    alphabet = as_alphabet(alphabet)
+    side = _square_side(alphabet)
+    if any(char not in model.alphabet.letters for char in alphabet):
+        raise ValueError("Алфавит модели должен содержать все буквы алфавита Плейфера.")
+    indices = alphabet.encode(ciphertext).astype(np.int64)
+    if len(indices) % 2:
+        raise ValueError("Шифртекст Плейфера должен содержать четное количество букв.")
+    if len(indices) < CRACK_ORDER:
+        raise ValueError("Шифртекст слишком короткий для взлома.")
+    digraphs = indices[0::2] * len(alphabet) + indices[1::2]
+    letters = np.array([model.alphabet.index[char] for char in alphabet], dtype=np.int64)
+    table = model.tables[CRACK_ORDER - 1]
+    seeds = [random.Random(seed).getrandbits(64) + restart for restart in range(restarts)]
+    args = (digraphs, table, len(model.alphabet), letters, side, iterations, temperature)
+
+    start = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, restarts)
+    if workers <= 1:
+        results = [_anneal(*args, restart_seed) for restart_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as executor:
+            results = list(executor.map(_anneal_in_worker, seeds))
+    speed = sum(steps for _, _, steps in results) / (time.perf_counter() - start)
+
+    square, _, _ = max(results, key=lambda result: result[1])
+    key = alphabet.decode(square)
+    plaintext = playfair_decrypt(alphabet.decode(indices), key, alphabet)
+    return key, model.mean_score(model.encode(plaintext)), plaintext, speed
 
 def main():
     print("Шифр Плейфера")
-    choice = input("Выберите действие (encrypt/decrypt): ").strip().lower()
+    choice = input("Выберите действие (encrypt/decrypt/crack): ").strip().lower()
     text = input("Введите текст: ")
+    if choice == 'crack':
+        key, score, result, speed = playfair_crack(text)
+        print(f"Ключ: {key}, оценка: {score:.3f}, итераций в секунду: {speed:.0f}")
+        print(f"Расшифрованный текст: {result}")
+        return
     key = input("Введите ключевое слово: ")
 
     if choice == 'encrypt':
@@ -137,7 +445,7 @@ def main():
         result = playfair_decrypt(text, key)
         print(f"Расшифрованный текст: {result}")
     else:
-        print("Неверный выбор. Пожалуйста, выберите 'encrypt' или 'decrypt'.")
+        print("Неверный выбор. Пожалуйста, выберите 'encrypt', 'decrypt' или 'crack'.")
 
 if __name__ == "__main__":
     main()
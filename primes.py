@@ -0,0 +1,428 @@
+# primes.py
+#
+# Проверка чисел на простоту и поиск простых чисел. Малые делители
+# отсеиваются колесом 2·3·5 и одним gcd с произведением малых простых,
+# числа меньше MR_DETERMINISTIC_LIMIT проверяются детерминированным тестом
+# Миллера — Рабина, большие — тестом Бэйли — PSW (BPSW). Для поиска
+# следующего простого и перечисления простых на отрезке используется
+# сегментированное решето, для массивов чисел — векторная проверка
+# is_prime_many.
+
+import math
+import os
+import secrets
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+
+# Числа меньше этой границы проверяются по таблице решета Эратосфена
+SMALL_PRIME_LIMIT = 1 << 12
+
+# Колесо 2·3·5: остатки по модулю 30, взаимно простые с 30
+WHEEL_MODULUS = 30
+WHEEL_RESIDUES = frozenset(r for r in range(WHEEL_MODULUS) if math.gcd(r, WHEEL_MODULUS) == 1)
+
+# Детерминированные наборы оснований Миллера — Рабина: набор (граница, основания)
+# дает точный ответ для всех n < граница
+MR_BASE_SETS = (
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (25326001, (2, 3, 5)),
+    (3215031751, (2, 3, 5, 7)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+MR_DETERMINISTIC_LIMIT = MR_BASE_SETS[-1][0]
+
+# Размер сегмента решета (в числах)
+SEGMENT_SIZE = 1 << 15
+
+# Граница простых, которыми сегментированное решето отсеивает кандидатов
+# (не включается); если sqrt(конца отрезка) не меньше, оставшиеся
+# кандидаты проверяются is_prime
+SIEVE_BASE_LIMIT = 1 << 16
+
+# Значения меньше этой границы is_prime_many проверяет по битовой таблице решета
+BULK_SIEVE_LIMIT = 1 << 24
+
+# Количество чисел, обрабатываемых is_prime_many за один шаг
+BULK_CHUNK_SIZE = 1 << 16
+
+# Массивы меньшего размера is_prime_many проверяет без пула процессов
+BULK_PARALLEL_MIN = 1 << 20
+
+# Малые простые, делимость на которые is_prime_many проверяет до теста Миллера — Рабина
+BULK_TRIAL_PRIMES = (3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+# Основания Миллера — Рабина, детерминированные для всех n < 2^64
+MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+# Границы векторного умножения по модулю: до WORD_LIMIT произведение
+# помещается в uint64; до EXTENDED_LIMIT частное вычисляется в long double
+# (нужна 64-битная мантисса, как у x87), остальное проверяет is_prime
+WORD_LIMIT = 1 << 32
+EXTENDED_LIMIT = 1 << 62 if np.finfo(np.longdouble).nmant >= 63 else WORD_LIMIT
+
+def _eratosthenes(limit):
+    table = np.ones(max(limit, 2), dtype=bool)
+    table[:2] = False
+    table[4::2] = False
+    for p in range(3, math.isqrt(limit - 1) + 1 if limit > 1 else 0, 2):
+        if table[p]:
+            table[p * p::2 * p] = False
+    return table[:limit]
+
+@lru_cache(maxsize=16)
+def sieve(limit):
+    """
+    Решето Эратосфена.
+
+    :param limit: Верхняя граница (не включается).
+    :return: Массив numpy bool длины limit: True для простых индексов.
+    """
+    table = _eratosthenes(limit)
+    table.flags.writeable = False
+    return table
+
+@lru_cache(maxsize=4)
+def sieve_bitset(limit):
+    """
+    Решето Эратосфена в виде битовой таблицы (бит i байта i // 8 —
+    простота числа i): в 8 раз меньше памяти, чем sieve.
+
+    :param limit: Верхняя граница (не включается).
+    :return: Массив numpy uint8.
+    """
+    bits = np.packbits(_eratosthenes(limit), bitorder='little')
+    bits.flags.writeable = False
+    return bits
+
+@lru_cache(maxsize=16)
+def small_primes(limit):
+    """
+    Простые числа меньше limit (кортеж целых Python).
+    """
+    return tuple(np.flatnonzero(sieve(limit)).tolist())
+
+@lru_cache(maxsize=1)
+def _trial_product():
+    """Произведение всех простых меньше SMALL_PRIME_LIMIT (для отсева одним gcd)."""
+    return math.prod(small_primes(SMALL_PRIME_LIMIT))
+
+def _mr_bases(n):
+    """Детерминированный набор оснований Миллера — Рабина для n < MR_DETERMINISTIC_LIMIT."""
+    for limit, bases in MR_BASE_SETS:
+        if n < limit:
+            return bases
+    raise ValueError(f"Для {n} нет детерминированного набора оснований.")
+
+def is_strong_probable_prime(n, base):
+    """
+    Один раунд теста Миллера — Рабина: является ли нечетное n > 2 сильно
+    вероятно простым по основанию base.
+    """
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    x = pow(base, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+def jacobi(a, n):
+    """Символ Якоби (a/n) для нечетного n > 0."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def is_strong_lucas_probable_prime(n):
+    """
+    Сильный тест Люка с параметрами Селфриджа (метод A) для нечетного
+    n > 2, не являющегося точным квадратом.
+    """
+    d_param = 5
+    while True:
+        symbol = jacobi(d_param, n)
+        if symbol == -1:
+            break
+        if symbol == 0 and abs(d_param) != n:
+            return False
+        d_param = -d_param - 2 if d_param > 0 else -d_param + 2
+    p_param, q_param = 1, (1 - d_param) // 4
+
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    # Вычисляем U_d, V_d и Q^d двоичным методом
+    u, v, qk = 1, p_param, q_param % n
+    for bit in bin(d)[3:]:
+        u, v = u * v % n, (v * v - 2 * qk) % n
+        qk = qk * qk % n
+        if bit == '1':
+            u, v = p_param * u + v, d_param * u + p_param * v
+            u = (u + n if u % 2 else u) // 2 % n
+            v = (v + n if v % 2 else v) // 2 % n
+            qk = qk * q_param % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * qk) % n
+        if v == 0:
+            return True
+        qk = qk * qk % n
+    return False
+
+def is_prime(n):
+    """
+    Проверка, является ли число простым. Ответ точный для
+    n < MR_DETERMINISTIC_LIMIT; для больших n используется BPSW, для
+    которого не известно ни одного контрпримера.
+
+    :param n: Целое число.
+    :return: True, если n простое.
+    """
+    n = int(n)
+    if n < SMALL_PRIME_LIMIT:
+        return n >= 2 and bool(sieve(SMALL_PRIME_LIMIT)[n])
+    if n % WHEEL_MODULUS not in WHEEL_RESIDUES:
+        return False
+    if math.gcd(n, _trial_product()) != 1:
+        return False
+    if n < SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT:
+        return True
+    if n < MR_DETERMINISTIC_LIMIT:
+        return all(is_strong_probable_prime(n, base) for base in _mr_bases(n))
+    if not is_strong_probable_prime(n, 2):
+        return False
+    root = math.isqrt(n)
+    return root * root != n and is_strong_lucas_probable_prime(n)
+
+def _sieve_segment(start, size, base):
+    """
+    Отсеивает отрезок [start, start + size) простыми base.
+
+    :return: Массив numpy bool: True для чисел без делителей из base
+             (кроме самих простых base).
+    """
+    segment = np.ones(size, dtype=bool)
+    if start < 2:
+        segment[:2 - start] = False
+    for p in base:
+        first = max(p * p, -(-start // p) * p)
+        if first >= start + size:
+            if p * p >= start + size:
+                break
+            continue
+        segment[first - start::p] = False
+    return segment
+
+def primes_in_range(start, stop=None, segment_size=SEGMENT_SIZE, sieve_limit=SIEVE_BASE_LIMIT):
+    """
+    Перечисляет простые числа на отрезке [start, stop) сегментированным
+    решетом. Если простых для решета не хватает (sqrt(stop) не меньше
+    sieve_limit), решето служит фильтром, а оставшиеся кандидаты
+    проверяются is_prime.
+
+    :param start: Начало отрезка.
+    :param stop: Конец отрезка (не включается); None — без ограничения.
+    :param segment_size: Размер сегмента решета.
+    :param sieve_limit: Граница простых для решета (не включается).
+    :return: Генератор простых чисел по возрастанию.
+    """
+    base = small_primes(sieve_limit)
+    low = max(start, 0)
+    while stop is None or low < stop:
+        high = low + segment_size if stop is None else min(low + segment_size, stop)
+        exact = math.isqrt(high - 1) < sieve_limit
+        for offset in np.flatnonzero(_sieve_segment(low, high - low, base)).tolist():
+            candidate = low + offset
+            if exact or is_prime(candidate):
+                yield candidate
+        low = high
+
+def next_prime(n):
+    """Нахождение следующего простого числа больше n."""
+    n = int(n)
+    if n < 2:
+        return 2
+    table = small_primes(SMALL_PRIME_LIMIT)
+    if n < table[-1]:
+        return table[bisect_right(table, n)]
+    # Сегмент порядка нескольких средних расстояний между простыми (~ln n).
+    # Решето тем глубже, чем дороже проверка каждого оставшегося кандидата
+    bits = n.bit_length()
+    segment_size = max(256, 4 * bits)
+    sieve_limit = min(SIEVE_BASE_LIMIT, max(256, bits * bits))
+    return next(primes_in_range(n + 1, segment_size=segment_size, sieve_limit=sieve_limit))
+
+def random_prime(bits, rng=None):
+    """
+    Случайное простое число заданной длины в битах.
+
+    :param bits: Длина числа в битах (не меньше 2).
+    :param rng: Генератор с методом getrandbits (по умолчанию secrets).
+    :return: Простое число p, 2^(bits - 1) <= p < 2^bits.
+    """
+    if bits < 2:
+        raise ValueError("Длина простого числа должна быть не меньше 2 бит.")
+    randbits = rng.getrandbits if rng is not None else secrets.randbits
+    while True:
+        candidate = next_prime((randbits(bits - 1) | (1 << (bits - 1))) - 1)
+        if candidate.bit_length() == bits:
+            return candidate
+
+def _mulmod_word(a, b, n):
+    """a * b mod n для n < WORD_LIMIT: произведение помещается в uint64."""
+    return (a * b) % n
+
+def _mulmod_extended(a, b, n):
+    """
+    a * b mod n для n < EXTENDED_LIMIT: частное оценивается в long double
+    с точностью до единиц, остаток вычисляется в uint64 по модулю 2^64
+    и исправляется.
+    """
+    q = (a.astype(np.longdouble) * b.astype(np.longdouble) / n.astype(np.longdouble)).astype(np.uint64)
+    r = (a * b - q * n).view(np.int64)
+    signed_n = n.view(np.int64)
+    for _ in range(2):
+        r = np.where(r < 0, r + signed_n, r)
+        r = np.where(r >= signed_n, r - signed_n, r)
+    return r.view(np.uint64)
+
+def _powmod_many(base, exponent, n, mulmod):
+    """Возведение в степень по модулю поэлементно: base^exponent mod n."""
+    result = np.ones_like(n)
+    exponent = exponent.copy()
+    while True:
+        odd = (exponent & np.uint64(1)).astype(bool)
+        result = np.where(odd, mulmod(result, base, n), result)
+        exponent >>= np.uint64(1)
+        if not exponent.any():
+            return result
+        base = mulmod(base, base, n)
+
+def _miller_rabin_many(n, bases, mulmod):
+    """
+    Векторный тест Миллера — Рабина для массива нечетных n (uint64) без
+    малых делителей. Числа, не прошедшие очередное основание, дальше не
+    проверяются.
+
+    :return: Массив numpy bool: True для чисел, прошедших все основания.
+    """
+    result = np.zeros(len(n), dtype=bool)
+    alive = np.arange(len(n))
+    d = n - np.uint64(1)
+    s = np.zeros(len(n), dtype=np.int64)
+    while True:
+        even = (d & np.uint64(1)) == 0
+        if not even.any():
+            break
+        d[even] >>= np.uint64(1)
+        s[even] += 1
+    for base in bases:
+        if not len(alive):
+            break
+        m, minus_one = n[alive], n[alive] - np.uint64(1)
+        a = np.uint64(base) % m
+        x = _powmod_many(a, d[alive], m, mulmod)
+        passed = (a == 0) | (x == 1) | (x == minus_one)
+        rounds = s[alive]
+        for r in range(1, int(rounds.max())):
+            x = mulmod(x, x, m)
+            passed |= (x == minus_one) & (r < rounds)
+        alive = alive[passed]
+    result[alive] = True
+    return result
+
+def _is_prime_chunk(values, sieve_limit):
+    """
+    Проверка фрагмента массива (numpy uint64) на простоту.
+
+    :return: Массив numpy bool той же длины.
+    """
+    result = np.zeros(len(values), dtype=bool)
+    small = values < sieve_limit
+    if small.any():
+        bits = sieve_bitset(sieve_limit)
+        v = values[small]
+        result[small] = (bits[v >> np.uint64(3)] >> (v & np.uint64(7)).astype(np.uint8)) & 1 == 1
+    large = np.flatnonzero(~small & (values & np.uint64(1) == 1))
+    for p in BULK_TRIAL_PRIMES:
+        large = large[values[large] % np.uint64(p) != 0]
+    n = values[large]
+    word = n < WORD_LIMIT
+    if word.any():
+        result[large[word]] = _miller_rabin_many(n[word], _mr_bases(WORD_LIMIT - 1), _mulmod_word)
+    extended = ~word & (n < EXTENDED_LIMIT)
+    if extended.any():
+        result[large[extended]] = _miller_rabin_many(n[extended], MR_BASES_64, _mulmod_extended)
+    for i in large[n >= EXTENDED_LIMIT]:
+        result[i] = is_prime(int(values[i]))
+    return result
+
+def is_prime_many(values, sieve_limit=BULK_SIEVE_LIMIT, chunk_size=BULK_CHUNK_SIZE, workers=None):
+    """
+    Проверка массива чисел на простоту. Числа меньше sieve_limit
+    проверяются по битовой таблице решета (строится один раз на процесс),
+    числа меньше 2^64 — векторным детерминированным тестом Миллера — Рабина,
+    остальные — is_prime. Массив обрабатывается фрагментами по chunk_size
+    чисел, поэтому объем временной памяти не зависит от его размера.
+
+    :param values: Массив или последовательность целых чисел.
+    :param sieve_limit: Граница таблицы решета (не меньше
+                        max(BULK_TRIAL_PRIMES) + 1: пробное деление
+                        больших чисел отбрасывает четные числа и кратные
+                        BULK_TRIAL_PRIMES, включая сами эти простые).
+    :param chunk_size: Размер фрагмента.
+    :param workers: Количество процессов (по умолчанию — число ядер);
+                    пул используется для массивов от BULK_PARALLEL_MIN чисел.
+    :return: Массив numpy bool той же формы: True для простых чисел.
+    """
+    array = np.asarray(values)
+    if array.size == 0:
+        return np.zeros(array.shape, dtype=bool)
+    if array.dtype.kind not in 'iuO':
+        raise ValueError("is_prime_many принимает только целые числа.")
+    sieve_limit = max(sieve_limit, max(BULK_TRIAL_PRIMES) + 1)
+    flat = array.ravel()
+    result = np.zeros(len(flat), dtype=bool)
+    if array.dtype.kind == 'u':
+        in_range = np.ones(len(flat), dtype=bool)
+    else:
+        in_range = (flat >= 0) & (flat < 1 << 64)
+    if array.dtype.kind == 'O':
+        for i in np.flatnonzero(~in_range & (flat > 0)):
+            result[i] = is_prime(flat[i])
+    indices = np.flatnonzero(in_range)
+    numbers = flat[indices].astype(np.uint64)
+    chunks = [numbers[i:i + chunk_size] for i in range(0, len(numbers), chunk_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(numbers) < BULK_PARALLEL_MIN:
+        parts = [_is_prime_chunk(chunk, sieve_limit) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_is_prime_chunk, chunks, repeat(sieve_limit), chunksize=4))
+    if parts:
+        result[indices] = np.concatenate(parts)
+    return result.reshape(array.shape)
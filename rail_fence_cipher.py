@@ -1,78 +1,388 @@
 # rail_fence_cipher.py
 
-def rail_fence_encrypt(plaintext, num_rails):
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from alphabet import NON_LETTER
+from instrumentation import instrumented
+from ngram_model import load_model
+
+# Размер блока (в символах), которым обрабатывается текст в потоковом режиме
+STREAM_BLOCK_SIZE = 1 << 16
+
+# Количество символов начала текста, по которым оценивается кандидат
+CRACK_SAMPLE_SIZE = 4096
+
+# Наибольшая длина текста, перестановки для которой кэшируются; для
+# более длинных текстов перестановка строится при каждом вызове, чтобы
+# кэш не удерживал массивы размером с текст (не больше 2 x 32 записей
+# по 256 КБ)
+PERMUTATION_CACHE_MAX_LENGTH = 1 << 16
+
+# Объем работы (кандидаты x символы выборки), начиная с которого перебор
+# распределяется по процессам
+PARALLEL_MIN_WORK = 1 << 24
+
+def _check_rails(num_rails):
+    if num_rails < 1:
+        raise ValueError("Количество рядов должно быть положительным.")
+
+def rail_lengths(length, num_rails, offset=0):
     """
-    Шифрует текст методом Rail Fence.
+    Вычисляет количество символов в каждом ряду зигзага.
     
-    :param plaintext: Открытый текст.
+    :param length: Длина текста.
     :param num_rails: Количество рядов.
-    :return: Зашифрованный текст.
+    :param offset: Смещение начала зигзага (зигзаг начинается так, будто
+                   перед текстом стоит offset символов).
+    :return: Список длин рядов.
+    """
+    if num_rails == 1:
+        return [length]
+    cycle = 2 * (num_rails - 1)
+    return [sum(len(range(start, length, cycle)) for start in _rail_starts(rail, num_rails, offset))
+            for rail in range(num_rails)]
+
+def _rail_starts(rail, num_rails, offset):
+    """
+    Первые позиции ряда в тексте (по возрастанию). Позиции ряда —
+    арифметические прогрессии с шагом cycle, начинающиеся с этих позиций.
+    """
+    cycle = 2 * (num_rails - 1)
+    return sorted({(rail - offset) % cycle, (cycle - rail - offset) % cycle})
+
+def zigzag_rails(positions, num_rails):
+    """
+    Номера рядов для позиций текста.
+    
+    :param positions: Массив позиций.
+    :param num_rails: Количество рядов.
+    :return: Массив номеров рядов.
+    """
+    if num_rails == 1:
+        return np.zeros(len(positions), dtype=np.intp)
+    cycle = 2 * (num_rails - 1)
+    phase = positions % cycle
+    return np.minimum(phase, cycle - phase)
+
+def _index_dtype(length):
+    return np.int32 if length < 2 ** 31 else np.int64
+
+def rail_fence_permutation(length, num_rails, offset=0):
+    """
+    Перестановка шифрования: ciphertext[k] = plaintext[permutation[k]].
+    Строится за O(n): позиции ряда — одна или две чередующиеся
+    арифметические прогрессии с шагом cycle, которые записываются в
+    результат через срезы с шагом 2. Для текстов не длиннее
+    PERMUTATION_CACHE_MAX_LENGTH кэшируется по (length, num_rails, offset).
+    
+    :param length: Длина текста.
+    :param num_rails: Количество рядов.
+    :param offset: Смещение начала зигзага.
+    :return: Массив индексов (только для чтения).
     """
+    if length <= PERMUTATION_CACHE_MAX_LENGTH:
+        return _cached_permutation(length, num_rails, offset)
+    return _build_permutation(length, num_rails, offset)
+
+def _build_permutation(length, num_rails, offset):
+    _check_rails(num_rails)
+    dtype = _index_dtype(length)
     if num_rails == 1:
-        return plaintext
+        permutation = np.arange(length, dtype=dtype)
+    else:
+        cycle = 2 * (num_rails - 1)
+        permutation = np.empty(length, dtype=dtype)
+        start = 0
+        for rail, rail_length in enumerate(rail_lengths(length, num_rails, offset)):
+            segment = permutation[start:start + rail_length]
+            starts = _rail_starts(rail, num_rails, offset)
+            if len(starts) == 2:
+                segment[0::2] = np.arange(starts[0], length, cycle)
+                segment[1::2] = np.arange(starts[1], length, cycle)
+            else:
+                segment[:] = np.arange(starts[0], length, cycle)
+            start += rail_length
+    permutation.flags.writeable = False
+    return permutation
 
-    rails = ['' for _ in range(num_rails)]
-    rail = 0
-    direction = 1  # 1 — вниз, -1 — вверх
+_cached_permutation = lru_cache(maxsize=32)(_build_permutation)
 
-    for char in plaintext:
-        rails[rail] += char
-        rail += direction
+def _count_before(positions, residues, cycle):
+    """
+    Количество чисел из [0, positions) с остатком residues по модулю cycle.
+    """
+    return positions // cycle + (positions % cycle > residues)
 
-        if rail == 0 or rail == num_rails - 1:
-            direction *= -1
+def rail_fence_source_positions(positions, length, num_rails, offset=0):
+    """
+    Для позиций открытого текста вычисляет, на каких позициях шифртекста
+    стоят их символы: plaintext[p] = ciphertext[result[p]]. Каждая позиция
+    обрабатывается независимо за O(1) (начало ряда плюс количество
+    предшествующих позиций того же ряда), поэтому можно расшифровать
+    любую часть текста, не строя перестановку целиком. На всем тексте
+    rail_fence_inverse_permutation быстрее.
+    
+    :param positions: Массив позиций открытого текста.
+    :param length: Длина текста.
+    :param num_rails: Количество рядов.
+    :param offset: Смещение начала зигзага.
+    :return: Массив позиций шифртекста.
+    """
+    _check_rails(num_rails)
+    positions = np.asarray(positions, dtype=np.int64)
+    if num_rails == 1:
+        return positions.astype(_index_dtype(length))
+    cycle = 2 * (num_rails - 1)
+    shifted = positions + offset
+    rails = zigzag_rails(shifted, num_rails)
+    first, second = rails, (cycle - rails) % cycle
+    middle = first != second
+    before = _count_before(shifted, first, cycle) - _count_before(offset, first, cycle)
+    before += middle * (_count_before(shifted, second, cycle) - _count_before(offset, second, cycle))
+    starts = np.cumsum([0] + rail_lengths(length, num_rails, offset)[:-1])
+    return (starts[rails] + before).astype(_index_dtype(length))
+
+def rail_fence_inverse_permutation(length, num_rails, offset=0):
+    """
+    Перестановка расшифрования: plaintext[k] = ciphertext[inverse[k]].
+    Кэшируется так же, как rail_fence_permutation.
+    
+    :param length: Длина текста.
+    :param num_rails: Количество рядов.
+    :param offset: Смещение начала зигзага.
+    :return: Массив индексов (только для чтения).
+    """
+    if length <= PERMUTATION_CACHE_MAX_LENGTH:
+        return _cached_inverse_permutation(length, num_rails, offset)
+    return _build_inverse_permutation(length, num_rails, offset)
 
-    return ''.join(rails)
+def _build_inverse_permutation(length, num_rails, offset):
+    permutation = rail_fence_permutation(length, num_rails, offset)
+    inverse = np.empty_like(permutation)
+    inverse[permutation] = np.arange(length, dtype=permutation.dtype)
+    inverse.flags.writeable = False
+    return inverse
+
+_cached_inverse_permutation = lru_cache(maxsize=32)(_build_inverse_permutation)
+
+def _to_codes(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def _from_codes(codes):
+    return codes.tobytes().decode('utf-32-le')
+
+@instrumented(size_arg=0)
+def rail_fence_encrypt(plaintext, num_rails, offset=0):
+    """
+    Шифрует текст методом Rail Fence.
+    
+    :param plaintext: Открытый текст.
+    :param num_rails: Количество рядов.
+    :param offset: Смещение начала зигзага.
+    :return: Зашифрованный текст.
+    """
+    permutation = rail_fence_permutation(len(plaintext), num_rails, offset)
+    return _from_codes(_to_codes(plaintext)[permutation])
 
-def rail_fence_decrypt(ciphertext, num_rails):
+@instrumented(size_arg=0)
+def rail_fence_decrypt(ciphertext, num_rails, offset=0):
     """
     Расшифровывает текст методом Rail Fence.
     
     :param ciphertext: Зашифрованный текст.
     :param num_rails: Количество рядов.
+    :param offset: Смещение начала зигзага.
     :return: Расшифрованный текст.
     """
+    inverse = rail_fence_inverse_permutation(len(ciphertext), num_rails, offset)
+    return _from_codes(_to_codes(ciphertext)[inverse])
+
+def _apply_many(messages, permutation_for):
+    messages = list(messages)
+    if not messages:
+        return []
+    length = len(messages[0])
+    if any(len(message) != length for message in messages):
+        raise ValueError("Все сообщения пакета должны иметь одинаковую длину.")
+    codes = _to_codes(''.join(messages)).reshape(len(messages), length)
+    joined = _from_codes(codes[:, permutation_for(length)])
+    return [joined[i * length:(i + 1) * length] for i in range(len(messages))]
+
+def rail_fence_encrypt_many(messages, num_rails):
+    """
+    Шифрует пакет сообщений одинаковой длины одной перестановкой
+    (одна операция индексирования над матрицей сообщений).
+    
+    :param messages: Итерируемый набор открытых текстов одной длины.
+    :param num_rails: Количество рядов.
+    :return: Список зашифрованных текстов.
+    """
+    return _apply_many(messages, lambda length: rail_fence_permutation(length, num_rails))
+
+def rail_fence_decrypt_many(messages, num_rails):
+    """
+    Расшифровывает пакет сообщений одинаковой длины одной перестановкой.
+    
+    :param messages: Итерируемый набор шифртекстов одной длины.
+    :param num_rails: Количество рядов.
+    :return: Список расшифрованных текстов.
+    """
+    return _apply_many(messages, lambda length: rail_fence_inverse_permutation(length, num_rails))
+
+def rail_fence_encrypt_stream(chunks, num_rails):
+    """
+    Потоково шифрует текст методом Rail Fence. Каждый ряд накапливается
+    во временном файле, поэтому объем памяти не зависит от длины текста.
+    
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param num_rails: Количество рядов.
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    _check_rails(num_rails)
+    if num_rails == 1:
+        yield from chunks
+        return
+
+    rails = [tempfile.TemporaryFile() for _ in range(num_rails)]
+    try:
+        offset = 0
+        for chunk in chunks:
+            codes = _to_codes(chunk)
+            chunk_rails = zigzag_rails(np.arange(offset, offset + len(codes)), num_rails)
+            counts = np.bincount(chunk_rails, minlength=num_rails)
+            grouped = codes[np.argsort(chunk_rails, kind='stable')]
+            start = 0
+            for spool, count in zip(rails, counts):
+                spool.write(grouped[start:start + count].tobytes())
+                start += count
+            offset += len(codes)
+
+        for spool in rails:
+            spool.seek(0)
+            while True:
+                block = spool.read(4 * STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block.decode('utf-32-le')
+    finally:
+        for spool in rails:
+            spool.close()
+
+def rail_fence_decrypt_stream(chunks, num_rails):
+    """
+    Потоково расшифровывает текст методом Rail Fence. Длины рядов зависят
+    от длины всего текста, поэтому шифртекст сначала сбрасывается во
+    временный файл в UTF-32 (4 байта на символ), а затем для каждого блока
+    открытого текста из каждого ряда читается нужное количество символов.
+    
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param num_rails: Количество рядов.
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    _check_rails(num_rails)
     if num_rails == 1:
-        return ciphertext
-
-    # Создаем матрицу для заполнения
-    mark = [['\n' for _ in range(len(ciphertext))] for _ in range(num_rails)]
-
-    # Определяем положение символов
-    rail = 0
-    direction = 1
-    for i in range(len(ciphertext)):
-        mark[rail][i] = '*'
-        rail += direction
-
-        if rail == 0 or rail == num_rails - 1:
-            direction *= -1
-
-    # Заполняем матрицу зашифрованными символами
-    index = 0
-    for r in range(num_rails):
-        for c in range(len(ciphertext)):
-            if mark[r][c] == '*' and index < len(ciphertext):
-                mark[r][c] = ciphertext[index]
-                index += 1
-
-    # Читаем расшифрованный текст
-    decrypted = ''
-    rail = 0
-    direction = 1
-    for i in range(len(ciphertext)):
-        decrypted += mark[rail][i]
-        rail += direction
-
-        if rail == 0 or rail == num_rails - 1:
-            direction *= -1
-
-    return decrypted
+        yield from chunks
+        return
+
+    with tempfile.TemporaryFile() as spool:
+        length = 0
+        for chunk in chunks:
+            spool.write(chunk.encode('utf-32-le'))
+            length += len(chunk)
+
+        cursors = np.cumsum([0] + rail_lengths(length, num_rails)[:-1])
+        for offset in range(0, length, STREAM_BLOCK_SIZE):
+            block_rails = zigzag_rails(np.arange(offset, min(offset + STREAM_BLOCK_SIZE, length)), num_rails)
+            counts = np.bincount(block_rails, minlength=num_rails)
+            grouped = []
+            for rail, count in enumerate(counts):
+                if count:
+                    spool.seek(4 * int(cursors[rail]))
+                    grouped.append(np.frombuffer(spool.read(4 * int(count)), dtype=np.uint32))
+                    cursors[rail] += count
+            decrypted = np.empty(len(block_rails), dtype=np.uint32)
+            decrypted[np.argsort(block_rails, kind='stable')] = np.concatenate(grouped)
+            yield _from_codes(decrypted)
+
+def _score_candidates(letters, model, candidates, sample_size):
+    """
+    Оценивает кандидатов (num_rails, offset): расшифровывает только первые
+    sample_size символов через rail_fence_source_positions и считает
+    среднюю логарифмическую вероятность букв выборки.
+    """
+    length = len(letters)
+    positions = np.arange(min(sample_size, length))
+    scored = []
+    for num_rails, offset in candidates:
+        sample = letters[rail_fence_source_positions(positions, length, num_rails, offset)]
+        scored.append((num_rails, offset, model.mean_score(sample[sample != NON_LETTER])))
+    return scored
+
+_worker_state = {}
+
+def _init_worker(letters, model, sample_size):
+    _worker_state['args'] = letters, model, sample_size
+
+def _score_candidates_in_worker(candidates):
+    letters, model, sample_size = _worker_state['args']
+    return _score_candidates(letters, model, candidates, sample_size)
+
+@instrumented(size_arg=0)
+def rail_fence_crack(ciphertext, max_rails=200, offsets=False, top=5, model=None,
+                     workers=None, sample_size=CRACK_SAMPLE_SIZE):
+    """
+    Подбирает количество рядов (и, при offsets=True, смещение зигзага)
+    перебором. Каждый кандидат оценивается языковой моделью по началу
+    открытого текста, полностью расшифровываются только лучшие top.
+    При большом объеме перебора кандидаты распределяются по процессам.
+    
+    :param ciphertext: Зашифрованный текст.
+    :param max_rails: Наибольшее проверяемое количество рядов.
+    :param offsets: Перебирать также смещения зигзага.
+    :param top: Количество возвращаемых кандидатов.
+    :param model: NgramModel (по умолчанию английская модель).
+    :param workers: Количество процессов (по умолчанию — число ядер).
+    :param sample_size: Количество оцениваемых символов начала текста.
+    :return: Список четверок (количество рядов, смещение, оценка, открытый
+             текст) по убыванию оценки.
+    """
+    model = model or load_model()
+    length = len(ciphertext)
+    candidates = [(num_rails, offset)
+                  for num_rails in range(2, min(max_rails, max(length - 1, 1)) + 1)
+                  for offset in (range(2 * (num_rails - 1)) if offsets else (0,))]
+    if not candidates:
+        return []
+
+    codes = _to_codes(ciphertext)
+    letters = model.alphabet.encode_codes(codes, passthrough=True)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(candidates) * min(sample_size, length) < PARALLEL_MIN_WORK:
+        scored = _score_candidates(letters, model, candidates, sample_size)
+    else:
+        batches = [candidates[i::workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(letters, model, sample_size)) as executor:
+            scored = [item for batch in executor.map(_score_candidates_in_worker, batches)
+                      for item in batch]
+
+    scored.sort(key=lambda item: (-item[2], item[0], item[1]))
+    return [(num_rails, offset, score, rail_fence_decrypt(ciphertext, num_rails, offset))
+            for num_rails, offset, score in scored[:top]]
 
 def main():
     print("Шифр Rail Fence")
-    choice = input("Выберите действие (encrypt/decrypt): ").strip().lower()
+    choice = input("Выберите действие (encrypt/decrypt/crack): ").strip().lower()
     text = input("Введите текст: ")
+    if choice == 'crack':
+        for num_rails, offset, score, result in rail_fence_crack(text, workers=1):
+            print(f"Рядов: {num_rails}, оценка: {score:.3f}, текст: {result}")
+        return
     num_rails = int(input("Введите количество рядов: "))
 
     if choice == 'encrypt':
@@ -82,7 +392,7 @@ def main():
         result = rail_fence_decrypt(text, num_rails)
         print(f"Расшифрованный текст: {result}")
     else:
-        print("Неверный выбор. Пожалуйста, выберите 'encrypt' или 'decrypt'.")
+        print("Неверный выбор. Пожалуйста, выберите 'encrypt', 'decrypt' или 'crack'.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,264 @@
+# seed_bruteforce.py
+#
+# Перебор seed для подстановочного шифра, ключ которого получен через
+# random.seed(str(seed)) и random.shuffle (задача из Cryptography.ipynb).
+# Диапазон seed делится на блоки, блоки обрабатываются пулом процессов;
+# поиск останавливается после первой находки, прогресс сохраняется в
+# контрольную точку, из которой прерванный поиск можно продолжить.
+#
+# Пример:
+#     python seed_bruteforce.py --stop 100000000 --checkpoint seeds.json
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import string
+import sys
+import time
+
+CIPHER = "sgwahu{sfj70d_s1pm3v_1j_4kj0_fj3xf1}"
+PREFIX = "codeby"
+LETTERS = string.ascii_lowercase
+
+# Как часто исполнитель проверяет флаг остановки (в seed)
+STOP_CHECK_INTERVAL = 4096
+
+def generate_key(entrypoint):
+    """
+    Генерирует ключ подстановки так же, как в ноутбуке.
+
+    :param entrypoint: Значение seed (строка).
+    :return: Словарь {буква открытого текста: буква шифртекста}.
+    """
+    random.seed(entrypoint)
+    key = list(LETTERS)
+    random.shuffle(key)
+    return dict(zip(LETTERS, key))
+
+def decrypt(key, cipher):
+    """
+    Расшифровывает текст ключом из generate_key.
+
+    :param key: Словарь подстановки.
+    :param cipher: Шифртекст.
+    :return: Открытый текст.
+    """
+    reverse_key = {v: k for k, v in key.items()}
+    return ''.join(reverse_key.get(c, c) for c in cipher)
+
+def prefix_checks(cipher, prefix):
+    """
+    Переводит известное начало открытого текста в условия на перестановку:
+    буква p открытого текста должна отображаться в букву c шифртекста,
+    то есть после перемешивания на позиции LETTERS.index(p) стоит c.
+
+    :param cipher: Шифртекст.
+    :param prefix: Известное начало открытого текста.
+    :return: Список пар (позиция, индекс буквы) по убыванию позиции
+             или None, если ни один ключ не подходит.
+    """
+    if len(prefix) > len(cipher):
+        return None
+    required = {}
+    for p, c in zip(prefix, cipher):
+        if p in LETTERS:
+            if c not in LETTERS or required.setdefault(p, c) != c:
+                return None
+        elif p != c:
+            return None  # Символы вне алфавита не шифруются
+    if len(set(required.values())) != len(required):
+        return None
+    return sorted(((LETTERS.index(p), LETTERS.index(c)) for p, c in required.items()), reverse=True)
+
+def seed_matches(rng, entrypoint, checks):
+    """
+    Проверяет один seed. Повторяет random.shuffle (Фишер — Йетс с конца
+    списка) и сверяет позиции сразу после того, как они окончательно
+    заполнены, поэтому для большинства seed хватает одного-двух шагов.
+
+    :param rng: Экземпляр random.Random, переиспользуемый между вызовами.
+    :param entrypoint: Значение seed (строка).
+    :param checks: Условия из prefix_checks.
+    :return: True, если ключ дает известное начало текста.
+    """
+    rng.seed(entrypoint)
+    randbelow = rng._randbelow
+    x = list(range(len(LETTERS)))
+    i = len(x) - 1
+    for position, expected in checks:
+        while i >= max(position, 1):
+            j = randbelow(i + 1)
+            x[i], x[j] = x[j], x[i]
+            i -= 1
+        if x[position] != expected:
+            return False
+    return True
+
+def seed_matches_reference(rng, entrypoint, checks):
+    """
+    Медленная проверка через полный random.shuffle.
+    """
+    rng.seed(entrypoint)
+    x = list(range(len(LETTERS)))
+    rng.shuffle(x)
+    return all(x[position] == expected for position, expected in checks)
+
+def shuffle_is_reproducible(samples=64):
+    """
+    Убеждается, что seed_matches повторяет random.shuffle текущей версии
+    Python. Иначе используется seed_matches_reference.
+    """
+    fast, slow = random.Random(), random.Random()
+    checks = [(position, 0) for position in range(len(LETTERS) - 1, -1, -1)]
+    for seed in map(str, range(samples)):
+        slow.seed(seed)
+        x = list(range(len(LETTERS)))
+        slow.shuffle(x)
+        expected = [(position, x[position]) for position, _ in checks]
+        if not seed_matches(fast, seed, expected):
+            return False
+    return True
+
+_worker_state = {}
+
+def _init_worker(checks, stop_event):
+    _worker_state['rng'] = random.Random()
+    _worker_state['checks'] = checks
+    _worker_state['stop'] = stop_event
+    _worker_state['match'] = seed_matches if shuffle_is_reproducible() else seed_matches_reference
+
+def search_block(block):
+    """
+    Проверяет блок seed в процессе-исполнителе.
+
+    :param block: Тройка (номер блока, начало, конец).
+    :return: Четверка (номер блока, найденные seed, количество проверенных
+             seed, признак того, что блок проверен полностью).
+    """
+    number, start, stop = block
+    rng = _worker_state['rng']
+    checks = _worker_state['checks']
+    stop_event = _worker_state['stop']
+    match = _worker_state['match']
+    hits = []
+    for base in range(start, stop, STOP_CHECK_INTERVAL):
+        if stop_event is not None and stop_event.is_set():
+            return number, hits, base - start, False
+        for seed in range(base, min(base + STOP_CHECK_INTERVAL, stop)):
+            if match(rng, str(seed), checks):
+                hits.append(seed)
+    return number, hits, stop - start, True
+
+def load_checkpoint(path, params):
+    """
+    Загружает контрольную точку, если она относится к тем же параметрам поиска.
+
+    :return: Пара (множество завершенных блоков, найденные seed).
+    """
+    if not path or not os.path.exists(path):
+        return set(), []
+    with open(path, 'r', encoding='utf-8') as file:
+        state = json.load(file)
+    if state.get('params') != params:
+        raise ValueError(f"Контрольная точка {path} относится к другим параметрам поиска.")
+    return set(state['completed']), state['hits']
+
+def save_checkpoint(path, params, completed, hits):
+    """
+    Атомарно сохраняет контрольную точку.
+    """
+    if not path:
+        return
+    state = {'params': params, 'completed': sorted(completed), 'hits': sorted(hits)}
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temp_path, path)
+
+def brute_force(cipher=CIPHER, prefix=PREFIX, start=0, stop=100_000_000, workers=None,
+                block_size=100_000, checkpoint=None, stop_on_hit=True,
+                report_interval=5.0, checkpoint_interval=30.0, log=sys.stderr):
+    """
+    Перебирает seed из диапазона [start, stop).
+
+    :param cipher: Шифртекст.
+    :param prefix: Известное начало открытого текста.
+    :param workers: Количество процессов (по умолчанию — число ядер).
+    :param block_size: Количество seed в одном блоке.
+    :param checkpoint: Путь к файлу контрольной точки (или None).
+    :param stop_on_hit: Остановить поиск после первой находки.
+    :param report_interval: Интервал вывода прогресса (секунды).
+    :param checkpoint_interval: Интервал сохранения контрольной точки (секунды).
+    :param log: Поток для вывода прогресса (или None).
+    :return: Список пар (seed, открытый текст).
+    """
+    checks = prefix_checks(cipher, prefix)
+    if checks is None:
+        return []
+    params = {'cipher': cipher, 'prefix': prefix, 'start': start, 'stop': stop, 'block_size': block_size}
+    completed, hits = load_checkpoint(checkpoint, params)
+    blocks = [(number, lo, min(lo + block_size, stop))
+              for number, lo in enumerate(range(start, stop, block_size))
+              if number not in completed]
+
+    if not (hits and stop_on_hit) and blocks:
+        stop_event = multiprocessing.Event()
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(checks, stop_event))
+        checked = 0
+        total = sum(hi - lo for _, lo, hi in blocks)
+        begin = last_report = last_checkpoint = time.perf_counter()
+        try:
+            for number, block_hits, count, complete in pool.imap_unordered(search_block, blocks):
+                checked += count
+                if complete:
+                    completed.add(number)
+                hits.extend(block_hits)
+                if block_hits and stop_on_hit:
+                    stop_event.set()
+                    break
+                now = time.perf_counter()
+                if log and now - last_report >= report_interval:
+                    print(f"Проверено {checked:,} из {total:,} seed, "
+                          f"{checked / (now - begin):,.0f} seed/с", file=log)
+                    last_report = now
+                if now - last_checkpoint >= checkpoint_interval:
+                    save_checkpoint(checkpoint, params, completed, hits)
+                    last_checkpoint = now
+        finally:
+            pool.terminate()
+            pool.join()
+            save_checkpoint(checkpoint, params, completed, hits)
+        if log:
+            elapsed = time.perf_counter() - begin
+            print(f"Итого: {checked:,} seed за {elapsed:.1f} с ({checked / elapsed:,.0f} seed/с)", file=log)
+
+    return [(seed, decrypt(generate_key(str(seed)), cipher)) for seed in sorted(hits)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перебор seed подстановочного шифра")
+    parser.add_argument('--cipher', default=CIPHER, help="Шифртекст")
+    parser.add_argument('--prefix', default=PREFIX, help="Известное начало открытого текста")
+    parser.add_argument('--start', type=int, default=0, help="Первый seed")
+    parser.add_argument('--stop', type=int, default=100_000_000, help="Seed, на котором перебор заканчивается")
+    parser.add_argument('--workers', type=int, default=None, help="Количество процессов")
+    parser.add_argument('--block-size', type=int, default=100_000, help="Количество seed в блоке")
+    parser.add_argument('--checkpoint', default=None, help="Файл контрольной точки")
+    parser.add_argument('--all', action='store_true', help="Не останавливаться после первой находки")
+    args = parser.parse_args(argv)
+
+    try:
+        results = brute_force(args.cipher, args.prefix, args.start, args.stop, args.workers,
+                              args.block_size, args.checkpoint, stop_on_hit=not args.all)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    for seed, message in results:
+        print(f"Seed: {seed}, Message: {message}")
+    if not results:
+        print("Подходящий seed не найден.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
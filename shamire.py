@@ -1,32 +1,42 @@
 # shamir_secret_sharing.py
 
+import os
 import random
-from functools import reduce
-from typing import List, Tuple
-
-def is_prime(n: int) -> bool:
-    """Проверка, является ли число простым."""
-    if n <= 1:
-        return False
-    if n <= 3:
-        return True
-    if n % 2 == 0 or n % 3 == 0:
-        return False
-    i = 5
-    w = 2
-    while i * i <= n:
-        if n % i == 0:
-            return False
-        i += w
-        w = 6 - w
-    return True
-
-def next_prime(n: int) -> int:
-    """Нахождение следующего простого числа больше n."""
-    while True:
-        n += 1
-        if is_prime(n):
-            return n
+import secrets
+import struct
+from functools import lru_cache, reduce
+from itertools import cycle
+from operator import mul
+from typing import BinaryIO, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from instrumentation import instrumented
+from primes import is_prime, next_prime
+
+# Фиксированное простое число Мерсенна для разделения секретов по фрагментам
+CHUNK_PRIME = 2 ** 127 - 1
+
+# Размер фрагмента секрета в байтах: любые 15 байт меньше CHUNK_PRIME
+CHUNK_BYTES = 15
+
+# Размер значения share по модулю CHUNK_PRIME в байтах
+CHUNK_SHARE_BYTES = 16
+
+# Простые числа меньше этой границы обрабатываются в numpy uint64:
+# значение (< prime), умноженное на x (< границы), помещается в 64 бита
+WORD_PRIME_LIMIT = 1 << 32
+
+# Неприводимый многочлен поля GF(2^8) (x^8 + x^4 + x^3 + x + 1, как в AES)
+GF256_POLYNOMIAL = 0x11B
+
+# Размер блока файла, обрабатываемого за один шаг (в байтах)
+FILE_BLOCK_SIZE = 1 << 20
+
+# Заголовок файла share: сигнатура, версия, x, порог k, длина секрета
+SHARE_MAGIC = b'SHMR'
+SHARE_VERSION = 1
+SHARE_HEADER = struct.Struct('<4sBBBQ')
 
 def generate_polynomial(secret: int, threshold: int, prime: int) -> List[int]:
     """
@@ -42,7 +52,7 @@ def generate_polynomial(secret: int, threshold: int, prime: int) -> List[int]:
 
 def evaluate_polynomial(coeffs: List[int], x: int, prime: int) -> int:
     """
-    Вычисление значения полинома в точке x.
+    Вычисление значения полинома в точке x по схеме Горнера.
     
     :param coeffs: Коэффициенты полинома.
     :param x: Точка для вычисления.
@@ -50,10 +60,72 @@ def evaluate_polynomial(coeffs: List[int], x: int, prime: int) -> int:
     :return: Значение полинома в точке x.
     """
     result = 0
-    for power, coeff in enumerate(coeffs):
-        result = (result + coeff * pow(x, power, prime)) % prime
+    for coeff in reversed(coeffs):
+        result = (result * x + coeff) % prime
     return result
 
+def evaluate_points(coeffs: Sequence[int], xs: Sequence[int], prime: int) -> List[int]:
+    """
+    Вычисление значений полинома сразу во всех точках xs.
+    
+    :param coeffs: Коэффициенты полинома.
+    :param xs: Точки для вычисления.
+    :param prime: Простое число для поля.
+    :return: Значения полинома в точках xs.
+    """
+    return [row[0] for row in evaluate_many([[coeff] for coeff in coeffs], xs, prime)]
+
+def evaluate_many(coeffs: Sequence[Sequence[int]], xs: Sequence[int], prime: int) -> List[List[int]]:
+    """
+    Вычисление значений нескольких полиномов одной степени во всех точках
+    xs. Схема Горнера выполняется одним проходом по коэффициентам для всех
+    точек и полиномов: для простых чисел меньше WORD_PRIME_LIMIT — в numpy
+    uint64, для больших — на целых Python с отложенным приведением по модулю.
+    
+    :param coeffs: Матрица коэффициентов: coeffs[d][j] — коэффициент при x^d
+                   полинома j.
+    :param xs: Точки для вычисления.
+    :param prime: Простое число для поля.
+    :return: Матрица значений: [i][j] — значение полинома j в точке xs[i].
+    """
+    xs = list(xs)
+    if not coeffs or not xs:
+        return [[0] * (len(coeffs[0]) if coeffs else 1) for _ in xs]
+    if prime < WORD_PRIME_LIMIT and max(xs) < WORD_PRIME_LIMIT:
+        return _evaluate_word(coeffs, xs, prime)
+    return _evaluate_big(coeffs, xs, prime)
+
+def _evaluate_word(coeffs: Sequence[Sequence[int]], xs: List[int], prime: int) -> List[List[int]]:
+    """Схема Горнера в numpy uint64 для простых чисел меньше WORD_PRIME_LIMIT."""
+    table = np.asarray(coeffs, dtype=np.uint64) % np.uint64(prime)
+    points = np.asarray(xs, dtype=np.uint64)[:, None] % np.uint64(prime)
+    values = np.zeros((len(xs), table.shape[1]), dtype=np.uint64)
+    values += table[-1]
+    for row in table[-2::-1]:
+        np.multiply(values, points, out=values)
+        values += row
+        np.remainder(values, np.uint64(prime), out=values)
+    return values.tolist()
+
+def _evaluate_big(coeffs: Sequence[Sequence[int]], xs: List[int], prime: int) -> List[List[int]]:
+    """
+    Схема Горнера на целых Python для больших простых чисел. Точки x малы
+    по сравнению с prime, поэтому за шаг значение растет лишь на
+    log2(max x) бит, и приводить его по модулю можно раз в несколько шагов.
+    """
+    width = len(coeffs[0])
+    lazy_steps = max(1, prime.bit_length() // max(max(xs).bit_length(), 1))
+    points = [x for x in xs for _ in range(width)]
+    values = [coeff % prime for coeff in coeffs[-1]] * len(xs)
+    for step, row in enumerate(reversed(coeffs[:-1]), 1):
+        if step % lazy_steps:
+            values = [value * x + coeff for value, x, coeff in zip(values, points, cycle(row))]
+        else:
+            values = [(value * x + coeff) % prime for value, x, coeff in zip(values, points, cycle(row))]
+    values = [value % prime for value in values]
+    return [values[i:i + width] for i in range(0, len(values), width)]
+
+@instrumented()
 def split_secret(secret: int, n: int, k: int) -> Tuple[int, List[Tuple[int, int]]]:
     """
     Разделение секрета на n частей с порогом k.
@@ -69,29 +141,86 @@ def split_secret(secret: int, n: int, k: int) -> Tuple[int, List[Tuple[int, int]
     prime = next_prime(max(secret, n))
     coeffs = generate_polynomial(secret, k, prime)
     
-    shares = []
-    for i in range(1, n + 1):
-        share = evaluate_polynomial(coeffs, i, prime)
-        shares.append((i, share))
+    xs = range(1, n + 1)
+    shares = list(zip(xs, evaluate_points(coeffs, xs, prime)))
     
     return prime, shares
 
 def extended_gcd(a: int, b: int) -> Tuple[int, int, int]:
-    """Расширенный алгоритм Евклида для нахождения НОД и коэффициентов Безу."""
-    if a == 0:
-        return (b, 0, 1)
-    else:
-        g, y, x = extended_gcd(b % a, a)
-        return (g, x - (b // a) * y, y)
+    """
+    Расширенный алгоритм Евклида для нахождения НОД и коэффициентов Безу.
+    Итеративный: глубина рекурсии не растет с размером чисел.
+    """
+    old_r, r = a, b
+    old_x, x = 1, 0
+    old_y, y = 0, 1
+    while r:
+        q = old_r // r
+        old_r, r = r, old_r - q * r
+        old_x, x = x, old_x - q * x
+        old_y, y = y, old_y - q * y
+    return (old_r, old_x, old_y)
 
 def mod_inverse(a: int, prime: int) -> int:
     """Нахождение мультипликативного обратного элемента a по модулю prime."""
-    g, x, _ = extended_gcd(a, prime)
+    g, x, _ = extended_gcd(a % prime, prime)
     if g != 1:
         raise ValueError(f"Обратный элемент для {a} по модулю {prime} не существует.")
     else:
         return x % prime
 
+def batch_inverse(values: Sequence[int], prime: int) -> List[int]:
+    """
+    Обратные элементы для всех values по модулю prime с одним вызовом
+    mod_inverse (прием Монтгомери): обращается произведение всех чисел,
+    а отдельные обратные получаются из префиксных произведений.
+    
+    :param values: Числа, взаимно простые с prime.
+    :param prime: Простое число для поля.
+    :return: Список обратных элементов в том же порядке.
+    """
+    prefix = [1]
+    for value in values:
+        prefix.append(prefix[-1] * value % prime)
+    inverse = mod_inverse(prefix[-1], prime)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = inverse * prefix[i] % prime
+        inverse = inverse * values[i] % prime
+    return result
+
+@lru_cache(maxsize=256)
+def lagrange_weights(xs: Tuple[int, ...], prime: int) -> Tuple[int, ...]:
+    """
+    Коэффициенты Лагранжа в точке 0 для набора x-координат shares:
+    секрет равен sum(w_j * y_j) mod prime. Результат кэшируется, поэтому
+    для фрагментов с одинаковыми x веса вычисляются один раз.
+    
+    :param xs: x-координаты shares (кортеж).
+    :param prime: Простое число для поля.
+    :return: Кортеж коэффициентов w_j = prod x_m / (x_m - x_j), m != j.
+    """
+    if len(set(x % prime for x in xs)) != len(xs):
+        raise ValueError("x-координаты shares должны быть различными.")
+    # Произведения x_m без x_j через префиксные и суффиксные произведения
+    prefix = [1]
+    for x in xs:
+        prefix.append(prefix[-1] * x % prime)
+    suffix = [1]
+    for x in reversed(xs):
+        suffix.append(suffix[-1] * x % prime)
+    suffix.reverse()
+    denominators = []
+    for xj in xs:
+        denominator = 1
+        for xm in xs:
+            if xm != xj:
+                denominator = denominator * (xm - xj) % prime
+        denominators.append(denominator)
+    inverses = batch_inverse(denominators, prime)
+    return tuple(prefix[j] * suffix[j + 1] % prime * inverses[j] % prime for j in range(len(xs)))
+
+@instrumented()
 def restore_secret(shares: List[Tuple[int, int]], prime: int) -> int:
     """
     Восстановление секрета из shares с использованием интерполяции Лагранжа.
@@ -103,17 +232,22 @@ def restore_secret(shares: List[Tuple[int, int]], prime: int) -> int:
     if len(shares) == 0:
         raise ValueError("Нет shares для восстановления секрета.")
     
-    secret = 0
-    for j, (xj, yj) in enumerate(shares):
-        numerator = 1
-        denominator = 1
-        for m, (xm, _) in enumerate(shares):
-            if m != j:
-                numerator = (numerator * (-xm)) % prime
-                denominator = (denominator * (xj - xm)) % prime
-        lagrange_coefficient = numerator * mod_inverse(denominator, prime)
-        secret = (prime + secret + (yj * lagrange_coefficient)) % prime
-    return secret
+    xs = tuple(x for x, _ in shares)
+    return restore_many(xs, [[y for _, y in shares]], prime)[0]
+
+def restore_many(xs: Sequence[int], values: Iterable[Sequence[int]], prime: int) -> List[int]:
+    """
+    Восстановление многих секретов, разделенных в одних и тех же точках xs:
+    коэффициенты Лагранжа вычисляются один раз, каждый секрет — одно
+    скалярное произведение.
+    
+    :param xs: x-координаты shares.
+    :param values: Для каждого секрета — значения shares в точках xs.
+    :param prime: Простое число для поля.
+    :return: Список восстановленных секретов.
+    """
+    weights = lagrange_weights(tuple(xs), prime)
+    return [sum(map(mul, weights, ys)) % prime for ys in values]
 
 def encode_string_to_int(s: str) -> int:
     """Преобразование строки в целое число."""
@@ -124,9 +258,267 @@ def decode_int_to_string(n: int) -> str:
     byte_length = (n.bit_length() + 7) // 8
     return n.to_bytes(byte_length, 'big').decode('utf-8')
 
+def _pad_chunks(data: bytes) -> List[int]:
+    """
+    Дополняет данные байтом 0x80 и нулями до кратной CHUNK_BYTES длины
+    и разбивает их на фрагменты-числа.
+    """
+    padded = data + b'\x80' + b'\0' * (-(len(data) + 1) % CHUNK_BYTES)
+    return [int.from_bytes(padded[i:i + CHUNK_BYTES], 'big') for i in range(0, len(padded), CHUNK_BYTES)]
+
+def _unpad_chunks(chunks: Iterable[int]) -> bytes:
+    """Собирает фрагменты обратно в данные и снимает дополнение."""
+    padded = b''.join(chunk.to_bytes(CHUNK_BYTES, 'big') for chunk in chunks)
+    end = padded.rstrip(b'\0')
+    if not end.endswith(b'\x80'):
+        raise ValueError("Восстановленные данные повреждены: неверное дополнение.")
+    return end[:-1]
+
+@instrumented(size_arg=0)
+def split_bytes(secret: bytes, n: int, k: int) -> List[Tuple[int, bytes]]:
+    """
+    Разделение секрета произвольного размера на n частей с порогом k.
+    Секрет делится на фрагменты по CHUNK_BYTES байт, каждый фрагмент
+    разделяется отдельным полиномом над фиксированным полем CHUNK_PRIME,
+    поэтому простое число не подбирается. Все полиномы вычисляются во
+    всех точках одним проходом evaluate_many.
+    
+    :param secret: Секрет (байты).
+    :param n: Общее количество частей.
+    :param k: Пороговое количество частей для восстановления.
+    :return: Список shares (x, данные), данные — значения фрагментов по
+             CHUNK_SHARE_BYTES байт.
+    """
+    _check_threshold(n, k, CHUNK_PRIME)
+    chunks = _pad_chunks(secret)
+    # coeffs[d][c] — коэффициент при x^d полинома фрагмента c
+    coeffs = [chunks] + [[secrets.randbelow(CHUNK_PRIME) for _ in chunks] for _ in range(k - 1)]
+    xs = range(1, n + 1)
+    return [(x, b''.join(value.to_bytes(CHUNK_SHARE_BYTES, 'big') for value in values))
+            for x, values in zip(xs, evaluate_many(coeffs, xs, CHUNK_PRIME))]
+
+@instrumented()
+def restore_bytes(shares: List[Tuple[int, bytes]]) -> bytes:
+    """
+    Восстановление секрета, разделенного split_bytes.
+    
+    :param shares: Список shares (x, данные), не меньше порога.
+    :return: Секрет (байты).
+    """
+    if not shares:
+        raise ValueError("Нет shares для восстановления секрета.")
+    lengths = {len(data) for _, data in shares}
+    if len(lengths) != 1 or lengths.pop() % CHUNK_SHARE_BYTES:
+        raise ValueError("Shares имеют разную или неверную длину.")
+    columns = [[int.from_bytes(data[i:i + CHUNK_SHARE_BYTES], 'big')
+                for i in range(0, len(data), CHUNK_SHARE_BYTES)] for _, data in shares]
+    chunks = restore_many([x for x, _ in shares], zip(*columns), CHUNK_PRIME)
+    return _unpad_chunks(chunks)
+
+def _check_threshold(n: int, k: int, field_size: int) -> None:
+    if k < 1:
+        raise ValueError("Пороговое значение k должно быть положительным.")
+    if k > n:
+        raise ValueError("Пороговое значение k не может превышать общее количество частей n.")
+    if n >= field_size:
+        raise ValueError(f"Количество частей n должно быть меньше размера поля {field_size}.")
+
+def _gf256_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Таблица умножения GF(2^8) (256 x 256) и таблица обратных элементов.
+    """
+    exp = [0] * 510
+    log = [0] * 256
+    value = 1
+    for power in range(255):
+        exp[power] = exp[power + 255] = value
+        log[value] = power
+        # Умножение на образующий элемент 3 = x + 1
+        value ^= value << 1
+        if value & 0x100:
+            value ^= GF256_POLYNOMIAL
+    exp, log = np.array(exp), np.array(log)
+    mul = exp[log[:, None] + log[None, :]].astype(np.uint8)
+    mul[0, :] = mul[:, 0] = 0
+    inverse = np.zeros(256, dtype=np.uint8)
+    inverse[1:] = exp[255 - log[1:]]
+    return mul, inverse
+
+GF256_MUL, GF256_INVERSE = _gf256_tables()
+
+def gf256_lagrange_weights(xs: Sequence[int]) -> List[int]:
+    """
+    Коэффициенты Лагранжа в точке 0 над GF(2^8): w_j = prod x_m / (x_m + x_j).
+    """
+    weights = []
+    for j, xj in enumerate(xs):
+        numerator = denominator = 1
+        for m, xm in enumerate(xs):
+            if m != j:
+                numerator = int(GF256_MUL[numerator, xm])
+                denominator = int(GF256_MUL[denominator, xm ^ xj])
+        if denominator == 0:
+            raise ValueError(f"Повторяющаяся координата x={xj}.")
+        weights.append(int(GF256_MUL[numerator, GF256_INVERSE[denominator]]))
+    return weights
+
+@lru_cache(maxsize=256)
+def _gf256_pair_table(factor: int) -> np.ndarray:
+    """
+    Таблица умножения пары байтов (uint16) на элемент factor поля GF(2^8):
+    одна выборка из таблицы обрабатывает сразу два байта.
+    """
+    row = GF256_MUL[factor].astype(np.uint16)
+    pairs = np.arange(1 << 16)
+    return row[pairs & 0xFF] | (row[pairs >> 8] << 8)
+
+def _as_pairs(block: np.ndarray) -> np.ndarray:
+    """Представляет блок байтов как uint16, дополняя нечетный блок нулем."""
+    if len(block) % 2:
+        block = np.append(block, np.uint8(0))
+    return block.view(np.uint16)
+
+def split_block_gf256(block: np.ndarray, n: int, k: int) -> np.ndarray:
+    """
+    Разделение блока байтов побайтово над GF(2^8): для каждого байта
+    строится свой полином со случайными коэффициентами, значения
+    вычисляются по схеме Горнера сразу для всего блока.
+    
+    :param block: Блок секрета (numpy uint8).
+    :param n: Общее количество частей.
+    :param k: Пороговое количество частей.
+    :return: Матрица (n x len(block)): строка x - 1 — данные share x.
+    """
+    secret = _as_pairs(block)
+    coeffs = np.frombuffer(os.urandom((k - 1) * secret.nbytes), dtype=np.uint16).reshape(k - 1, len(secret))
+    shares = np.empty((n, len(secret)), dtype=np.uint16)
+    for x in range(1, n + 1):
+        table = _gf256_pair_table(x)
+        values = shares[x - 1]
+        values[:] = coeffs[-1] if k > 1 else secret
+        for coeff in (*coeffs[-2::-1], secret)[:k - 1]:
+            np.take(table, values, out=values)
+            values ^= coeff
+    return shares.view(np.uint8)[:, :len(block)]
+
+def split_stream(source: BinaryIO, targets: Sequence[BinaryIO], k: int, length: int) -> None:
+    """
+    Потоково разделяет данные на len(targets) shares над GF(2^8). Данные
+    читаются блоками по FILE_BLOCK_SIZE байт, поэтому память не зависит
+    от размера секрета.
+    
+    :param source: Двоичный поток секрета.
+    :param targets: Двоичные потоки shares (share x пишется в targets[x - 1]).
+    :param k: Пороговое количество частей.
+    :param length: Длина секрета в байтах (записывается в заголовок).
+    """
+    n = len(targets)
+    _check_threshold(n, k, 256)
+    for x, target in enumerate(targets, 1):
+        target.write(SHARE_HEADER.pack(SHARE_MAGIC, SHARE_VERSION, x, k, length))
+    while True:
+        block = source.read(FILE_BLOCK_SIZE)
+        if not block:
+            break
+        shares = split_block_gf256(np.frombuffer(block, dtype=np.uint8), n, k)
+        for target, share in zip(targets, shares):
+            target.write(share.tobytes())
+
+def restore_stream(sources: Sequence[BinaryIO], target: BinaryIO) -> None:
+    """
+    Потоково восстанавливает секрет из shares, записанных split_stream.
+    
+    :param sources: Двоичные потоки shares (не меньше порога).
+    :param target: Двоичный поток для секрета.
+    """
+    headers = []
+    for source in sources:
+        header = source.read(SHARE_HEADER.size)
+        if len(header) != SHARE_HEADER.size:
+            raise ValueError("Файл share поврежден: нет заголовка.")
+        magic, version, x, k, length = SHARE_HEADER.unpack(header)
+        if magic != SHARE_MAGIC or version != SHARE_VERSION:
+            raise ValueError("Файл не является share.")
+        headers.append((x, k, length))
+    if not headers:
+        raise ValueError("Нет shares для восстановления секрета.")
+    if len({(k, length) for _, k, length in headers}) != 1:
+        raise ValueError("Shares относятся к разным секретам.")
+    k, length = headers[0][1:]
+    if len(headers) < k:
+        raise ValueError(f"Недостаточно shares: {len(headers)} из {k}.")
+    sources = sources[:k]
+    weights = gf256_lagrange_weights([x for x, _, _ in headers[:k]])
+    remaining = length
+    while remaining:
+        size = min(FILE_BLOCK_SIZE, remaining)
+        secret = np.zeros((size + 1) // 2, dtype=np.uint16)
+        for source, weight in zip(sources, weights):
+            block = source.read(size)
+            if len(block) != size:
+                raise ValueError("Файл share поврежден: данные обрываются.")
+            secret ^= _gf256_pair_table(weight)[_as_pairs(np.frombuffer(block, dtype=np.uint8))]
+        target.write(secret.view(np.uint8)[:size].tobytes())
+        remaining -= size
+
+@instrumented()
+def split_file(path: str, n: int, k: int, prefix: str = None) -> List[str]:
+    """
+    Разделяет файл на n файлов shares с порогом k (prefix.1, prefix.2, ...).
+    
+    :param path: Путь к файлу секрета.
+    :param n: Общее количество частей.
+    :param k: Пороговое количество частей.
+    :param prefix: Префикс путей shares (по умолчанию путь к файлу).
+    :return: Список путей shares.
+    """
+    prefix = prefix or path
+    paths = [f"{prefix}.{x}" for x in range(1, n + 1)]
+    with open(path, 'rb') as source:
+        length = source.seek(0, 2)
+        source.seek(0)
+        targets = [open(share_path, 'wb') for share_path in paths]
+        try:
+            split_stream(source, targets, k, length)
+        finally:
+            for target in targets:
+                target.close()
+    return paths
+
+@instrumented()
+def restore_file(share_paths: Sequence[str], path: str) -> None:
+    """
+    Восстанавливает файл из файлов shares.
+    
+    :param share_paths: Пути к файлам shares (не меньше порога).
+    :param path: Путь к восстановленному файлу.
+    """
+    sources = [open(share_path, 'rb') for share_path in share_paths]
+    try:
+        with open(path, 'wb') as target:
+            restore_stream(sources, target)
+    finally:
+        for source in sources:
+            source.close()
+
 def main():
     print("Метод Шамира для разделения и восстановления секрета")
-    choice = input("Выберите действие (split/restore): ").strip().lower()
+    choice = input("Выберите действие (split/restore/split-file/restore-file): ").strip().lower()
+    
+    if choice == 'split-file':
+        path = input("Введите путь к файлу: ").strip()
+        n = int(input("Введите общее количество частей (n): "))
+        k = int(input("Введите пороговое количество частей для восстановления (k): "))
+        for share_path in split_file(path, n, k):
+            print(f"Share: {share_path}")
+        return
+    
+    if choice == 'restore-file':
+        share_paths = input("Введите пути к файлам shares через пробел: ").split()
+        path = input("Введите путь к восстановленному файлу: ").strip()
+        restore_file(share_paths, path)
+        print(f"Файл восстановлен: {path}")
+        return
     
     if choice == 'split':
         secret_input = input("Введите секрет (строка или число): ").strip()
@@ -169,7 +561,7 @@ def main():
             print(f"Восстановленный секрет (число): {secret}")
     
     else:
-        print("Неверный выбор. Пожалуйста, выберите 'split' или 'restore'.")
+        print("Неверный выбор. Пожалуйста, выберите 'split', 'restore', 'split-file' или 'restore-file'.")
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,30 @@
 # substitution_cipher.py
 
-def create_substitution_mapping(key):
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from alphabet import LATIN
+from instrumentation import instrumented
+from key_cache import KEY_CACHE
+from monoalphabetic import compile_mapping, translate
+from ngram_model import load_model
+
+# Порядок n-грамм, по которым оценивается ключ при взломе
+CRACK_ORDER = 4
+
+def create_substitution_mapping(key, alphabet=LATIN):
     """
     Создает словарь для подстановки на основе ключа.
     
     :param key: Ключевое слово (должно содержать все буквы алфавита без повторений).
+    :param alphabet: Алфавит (Alphabet или строка букв).
     :return: Два словаря: для шифрования и расшифровки.
     """
-    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    alphabet = str(alphabet)
     key = ''.join(sorted(set(key.lower()), key=key.index))  # Удаляем повторы, сохраняем порядок
     remaining = ''.join([c for c in alphabet if c not in key])
     substitution = key + remaining
@@ -16,6 +33,11 @@ def create_substitution_mapping(key):
     decrypt_mapping = {b: a for a, b in zip(alphabet, substitution)}
     return encrypt_mapping, decrypt_mapping
 
+def _mapping_table(mapping):
+    # Таблица str.translate для словаря подстановки (хранится в KEY_CACHE)
+    return KEY_CACHE.get_or_build('substitution', tuple(mapping.items()), None, compile_mapping, mapping)
+
+@instrumented(size_arg=0)
 def substitution_encrypt(plaintext, encrypt_mapping):
     """
     Шифрует текст подстановкой.
@@ -24,14 +46,9 @@ def substitution_encrypt(plaintext, encrypt_mapping):
     :param encrypt_mapping: Словарь для шифрования.
     :return: Зашифрованный текст.
     """
-    encrypted = ''
-    for char in plaintext.lower():
-        if char in encrypt_mapping:
-            encrypted += encrypt_mapping[char]
-        else:
-            encrypted += char  # Не изменяем символы вне алфавита
-    return encrypted
+    return translate(plaintext, _mapping_table(encrypt_mapping))
 
+@instrumented(size_arg=0)
 def substitution_decrypt(ciphertext, decrypt_mapping):
     """
     Расшифровывает текст подстановкой.
@@ -40,18 +57,167 @@ def substitution_decrypt(ciphertext, decrypt_mapping):
     :param decrypt_mapping: Словарь для расшифровки.
     :return: Расшифрованный текст.
     """
-    decrypted = ''
-    for char in ciphertext.lower():
-        if char in decrypt_mapping:
-            decrypted += decrypt_mapping[char]
-        else:
-            decrypted += char  # Не изменяем символы вне алфавита
-    return decrypted
+    return translate(ciphertext, _mapping_table(decrypt_mapping))
+
+def substitution_encrypt_stream(chunks, encrypt_mapping):
+    """
+    Потоково шифрует текст подстановкой.
+
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param encrypt_mapping: Словарь для шифрования.
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    table = _mapping_table(encrypt_mapping)
+    for chunk in chunks:
+        yield translate(chunk, table)
+
+def substitution_decrypt_stream(chunks, decrypt_mapping):
+    """
+    Потоково расшифровывает текст подстановкой.
+
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param decrypt_mapping: Словарь для расшифровки.
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    return substitution_encrypt_stream(chunks, decrypt_mapping)
+
+def _window_weights(indices, radix, order=CRACK_ORDER):
+    """
+    Индекс позиций по буквам шифртекста: weights[x, i] — вклад буквы x в
+    упакованный код n-граммы, начинающейся с позиции i (сумма radix ** (order - 1 - j)
+    по позициям j окна, где стоит x). Ненулевые элементы строки x — окна,
+    которые затрагивает замена буквы x.
+    """
+    windows = len(indices) - order + 1
+    weights = np.zeros((radix, windows), dtype=np.int64)
+    columns = np.arange(windows)
+    for j in range(order):
+        np.add.at(weights, (indices[j:j + windows], columns), radix ** (order - 1 - j))
+    return weights
+
+def _swap_moves(weights):
+    """
+    Для каждой пары букв шифртекста (x, y), хотя бы одна из которых
+    встречается в тексте, готовит окна, затрагиваемые обменом их
+    расшифровок, и изменение кода окна на единицу разности расшифровок.
+
+    :return: Список четверок (x, y, индексы окон, изменения кодов).
+    """
+    radix = len(weights)
+    present = [np.flatnonzero(row) for row in weights]
+    moves = []
+    for x in range(radix):
+        for y in range(x + 1, radix):
+            windows = np.union1d(present[x], present[y])
+            if len(windows):
+                moves.append((x, y, windows, weights[x, windows] - weights[y, windows]))
+    return moves
+
+def _climb(indices, table, radix, iterations, temperature, seed):
+    """
+    Один запуск отжига из случайного ключа. Ключ — перестановка key, где
+    key[x] — буква открытого текста для буквы шифртекста x. При обмене
+    key[x] и key[y] пересчитываются только окна, содержащие x или y:
+    новые коды получаются прибавлением (key[y] - key[x]) * (W[x] - W[y]).
+
+    :param temperature: Начальная температура (0 — восхождение к вершине);
+                        температура линейно снижается до нуля.
+    :return: Пара (ключ, оценка).
+    """
+    rng = random.Random(seed)
+    weights = _window_weights(indices, radix)
+    moves = _swap_moves(weights)
+    key = list(range(radix))
+    rng.shuffle(key)
+    codes = np.asarray(key, dtype=np.int64) @ weights
+    scores = table[codes].astype(np.float64)
+    current = float(scores.sum())
+    best, best_key = current, key[:]
+    if not moves:
+        return best_key, best
+
+    for step in range(iterations):
+        x, y, windows, change = moves[rng.randrange(len(moves))]
+        new_codes = codes[windows] + (key[y] - key[x]) * change
+        new_scores = table[new_codes]
+        delta = float(new_scores.sum(dtype=np.float64) - scores[windows].sum())
+        if delta < 0:
+            heat = temperature * (1 - step / iterations)
+            if heat <= 0 or rng.random() >= math.exp(delta / heat):
+                continue
+        codes[windows] = new_codes
+        scores[windows] = new_scores
+        key[x], key[y] = key[y], key[x]
+        current += delta
+        if current > best:
+            best, best_key = current, key[:]
+    return best_key, best
+
+_worker_state = {}
+
+def _init_worker(indices, table, radix, iterations, temperature):
+    _worker_state['args'] = indices, table, radix, iterations, temperature
+
+def _climb_in_worker(seed):
+    return _climb(*_worker_state['args'], seed)
+
+@instrumented(size_arg=0)
+def substitution_crack(ciphertext, restarts=8, iterations=4000, temperature=0.5,
+                       model=None, workers=None, seed=None):
+    """
+    Подбирает ключ подстановочного шифра отжигом по квадграммной модели
+    с несколькими случайными перезапусками, распределенными по процессам.
+
+    :param ciphertext: Зашифрованный текст.
+    :param restarts: Количество перезапусков.
+    :param iterations: Количество попыток обмена в одном перезапуске.
+    :param temperature: Начальная температура отжига (0 — восхождение к вершине).
+    :param model: NgramModel (по умолчанию английская модель); алфавит
+                  модели задает алфавит подстановки.
+    :param workers: Количество процессов (по умолчанию — число ядер,
+                    но не больше числа перезапусков).
+    :param seed: Начальное значение генератора случайных чисел.
+    :return: Тройка (ключ для create_substitution_mapping, средняя оценка на
+             букву, открытый текст).
+    """
+    model = model or load_model()
+    alphabet = model.alphabet
+    indices = model.encode(ciphertext)
+    if len(indices) < CRACK_ORDER:
+        raise ValueError("Шифртекст слишком короткий для взлома.")
+    radix = len(alphabet)
+    table = model.tables[CRACK_ORDER - 1]
+    seeds = [random.Random(seed).getrandbits(64) + restart for restart in range(restarts)]
+    args = (indices, table, radix, iterations, temperature)
+
+    workers = min(workers or os.cpu_count() or 1, restarts)
+    if workers <= 1:
+        results = [_climb(*args, restart_seed) for restart_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as executor:
+            results = list(executor.map(_climb_in_worker, seeds))
+
+    key, _ = max(results, key=lambda result: result[1])
+    # key[x] — буква открытого текста для буквы шифртекста x; ключ
+    # create_substitution_mapping перечисляет буквы шифртекста по порядку
+    # букв открытого текста
+    substitution = [''] * radix
+    for cipher_letter, plain_letter in enumerate(key):
+        substitution[plain_letter] = alphabet[cipher_letter]
+    substitution = ''.join(substitution)
+    _, decrypt_mapping = create_substitution_mapping(substitution, alphabet)
+    plaintext = substitution_decrypt(ciphertext, decrypt_mapping)
+    return substitution, model.mean_score(model.encode(plaintext)), plaintext
 
 def main():
     print("Простой подстановочный шифр")
-    choice = input("Выберите действие (encrypt/decrypt): ").strip().lower()
+    choice = input("Выберите действие (encrypt/decrypt/crack): ").strip().lower()
     text = input("Введите текст: ")
+    if choice == 'crack':
+        key, score, result = substitution_crack(text)
+        print(f"Ключ: {key}, оценка: {score:.3f}")
+        print(f"Расшифрованный текст: {result}")
+        return
     key = input("Введите ключ (порядок букв подстановки): ")
 
     encrypt_mapping, decrypt_mapping = create_substitution_mapping(key)
@@ -63,7 +229,7 @@ def main():
         result = substitution_decrypt(text, decrypt_mapping)
         print(f"Расшифрованный текст: {result}")
     else:
-        print("Неверный выбор. Пожалуйста, выберите 'encrypt' или 'decrypt'.")
+        print("Неверный выбор. Пожалуйста, выберите 'encrypt', 'decrypt' или 'crack'.")
 
 if __name__ == "__main__":
     main()
@@ -1,50 +1,141 @@
-import math
-
-def vigenere_cipher_russian(plaintext, key):
-    # Определение русского алфавита с буквой 'ё'
-    alphabet = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
-    letter_to_index = {char: idx for idx, char in enumerate(alphabet)}
-    index_to_letter = {idx: char for idx, char in enumerate(alphabet)}
-    
-    # Предобработка: приведение к нижнему регистру и удаление пробелов
-    plaintext = plaintext.lower().replace(' ', '')
-    key = key.lower().replace(' ', '')
-    
-    # Преобразование букв в индексы
-    try:
-        plaintext_indices = [letter_to_index[c] for c in plaintext]
-    except KeyError as e:
-        raise ValueError(f"Недопустимый символ в открытом тексте: {e}")
-    
+import numpy as np
+
+from alphabet import NON_LETTER, RUSSIAN, as_alphabet
+from instrumentation import instrumented
+from key_cache import KEY_CACHE
+
+# Русский алфавит с буквой 'ё'
+ALPHABET = RUSSIAN.letters
+
+def _normalize(text):
+    # Предобработка: приведение к нижнему регистру, удаление пробелов и переводов строк
+    return text.lower().replace(' ', '').replace('\r', '').replace('\n', '')
+
+def _key_schedules(key, alphabet):
+    """
+    Сдвиги ключа для шифрования и расшифровки (numpy uint8). Хранятся в
+    KEY_CACHE по нормализованному ключу; массивы доступны только для чтения.
+    """
+    return KEY_CACHE.get_or_build('vigenere', _normalize(key), alphabet, _build_key_schedules, key, alphabet)
+
+def _build_key_schedules(key, alphabet):
     try:
-        key_indices = [letter_to_index[c] for c in key]
+        schedule = np.array([alphabet.index[c] for c in _normalize(key)], dtype=np.uint8)
     except KeyError as e:
         raise ValueError(f"Недопустимый символ в ключе: {e}")
-    
-    # Количество столбцов
-    columns = 6
-    # Разбиение открытого текста на строки по 6 букв
-    num_rows = math.ceil(len(plaintext_indices) / columns)
-    
-    # Разбиение ключа на строки по 6 букв
-    key_matrix = [key_indices[i:i+columns] for i in range(0, len(key_indices), columns)]
-    
-    # Формирование полного ключа, повторяя блоки ключа по необходимости
-    key_full = []
-    for row in range(num_rows):
-        key_row = key_matrix[row % len(key_matrix)]
-        key_full.extend(key_row)
-    
-    # Обрезаем ключ до длины открытого текста
-    key_full = key_full[:len(plaintext_indices)]
-    
-    # Шифрование: добавление индексов и взятие по модулю 33
-    ciphertext_indices = [(p + k) % 33 for p, k in zip(plaintext_indices, key_full)]
-    
-    # Преобразование индексов обратно в буквы
-    ciphertext = ''.join([index_to_letter[idx] for idx in ciphertext_indices])
-    
-    return ciphertext
+    if not len(schedule):
+        raise ValueError("Ключ не может быть пустым.")
+    inverse = ((len(alphabet) - schedule.astype(np.int64)) % len(alphabet)).astype(np.uint8)
+    schedule.flags.writeable = inverse.flags.writeable = False
+    return schedule, inverse
+
+def _shift_indices(indices, schedule, position, size):
+    """
+    Прибавляет к индексам сдвиги ключа по модулю size на месте. Ключ не
+    разворачивается на длину текста: текст рассматривается как матрица
+    строк длиной в период ключа, к которой прибавляется одна строка сдвигов.
+
+    :param indices: Массив индексов букв.
+    :param schedule: Период сдвигов ключа.
+    :param position: Номер буквы текста, с которой начинается массив.
+    :param size: Размер алфавита.
+    """
+    period = len(schedule)
+    shifts = np.roll(schedule, -(position % period)).astype(indices.dtype)
+    full = len(indices) - len(indices) % period
+    body = indices[:full].reshape(-1, period)
+    body += shifts
+    indices[full:] += shifts[:len(indices) - full]
+    np.subtract(indices, size, out=indices, where=indices >= size)
+
+def _vigenere_stream(chunks, schedule, alphabet, passthrough, label):
+    size = len(alphabet)
+    # Сумма двух индексов должна помещаться в тип массива
+    dtype = np.uint8 if 2 * size <= NON_LETTER else np.uint16
+    position = 0
+    for chunk in chunks:
+        if passthrough:
+            codes = np.frombuffer(chunk.lower().encode('utf-32-le'), dtype=np.uint32).copy()
+            indices = alphabet.encode_codes(codes, passthrough=True)
+            letters = indices != NON_LETTER
+            values = indices[letters].astype(dtype)
+        else:
+            chunk = _normalize(chunk)
+            values = alphabet.encode(chunk, passthrough=True)
+            invalid = np.flatnonzero(values == NON_LETTER)
+            if len(invalid):
+                raise ValueError(f"Недопустимый символ в {label}: '{chunk[invalid[0]]}'")
+            values = values.astype(dtype)
+
+        _shift_indices(values, schedule, position, size)
+        position += len(values)
+
+        if passthrough:
+            codes[letters] = alphabet.codes[values]
+            yield codes.tobytes().decode('utf-32-le')
+        else:
+            yield alphabet.decode(values)
+
+@instrumented(size_arg=0)
+def vigenere_cipher_russian(plaintext, key, alphabet=RUSSIAN, passthrough=False):
+    """
+    Шифрует текст шифром Виженера (по умолчанию над русским алфавитом).
+    Ключ повторяется до длины открытого текста.
+
+    :param plaintext: Открытый текст.
+    :param key: Ключ.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :param passthrough: Сохранять символы вне алфавита на своих местах
+                        (позиция в ключе по ним не сдвигается); иначе
+                        пробелы и переводы строк удаляются, а прочие
+                        символы вызывают ValueError.
+    :return: Зашифрованный текст.
+    """
+    return ''.join(vigenere_cipher_russian_stream([plaintext], key, alphabet, passthrough))
+
+@instrumented(size_arg=0)
+def vigenere_decrypt_russian(ciphertext, key, alphabet=RUSSIAN, passthrough=False):
+    """
+    Расшифровывает текст, зашифрованный vigenere_cipher_russian.
+
+    :param ciphertext: Зашифрованный текст.
+    :param key: Ключ.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :param passthrough: Сохранять символы вне алфавита на своих местах.
+    :return: Расшифрованный текст.
+    """
+    return ''.join(vigenere_decrypt_russian_stream([ciphertext], key, alphabet, passthrough))
+
+def vigenere_cipher_russian_stream(chunks, key, alphabet=RUSSIAN, passthrough=False):
+    """
+    Потоково шифрует текст шифром Виженера. Позиция в ключе переносится
+    между фрагментами, поэтому результат совпадает с шифрованием всего
+    текста целиком.
+
+    :param chunks: Итерируемый набор фрагментов открытого текста.
+    :param key: Ключ.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :param passthrough: Сохранять символы вне алфавита на своих местах.
+    :return: Генератор фрагментов зашифрованного текста.
+    """
+    alphabet = as_alphabet(alphabet)
+    schedule, _ = _key_schedules(key, alphabet)
+    return _vigenere_stream(chunks, schedule, alphabet, passthrough, "открытом тексте")
+
+def vigenere_decrypt_russian_stream(chunks, key, alphabet=RUSSIAN, passthrough=False):
+    """
+    Потоково расшифровывает текст шифром Виженера: прибавляются
+    противоположные по модулю размера алфавита сдвиги ключа.
+
+    :param chunks: Итерируемый набор фрагментов зашифрованного текста.
+    :param key: Ключ.
+    :param alphabet: Алфавит (Alphabet или строка букв).
+    :param passthrough: Сохранять символы вне алфавита на своих местах.
+    :return: Генератор фрагментов расшифрованного текста.
+    """
+    alphabet = as_alphabet(alphabet)
+    _, schedule = _key_schedules(key, alphabet)
+    return _vigenere_stream(chunks, schedule, alphabet, passthrough, "шифртексте")
 
 def main():
     # Открытый текст
@@ -54,6 +145,8 @@ def main():
     # Шифрование
     ciphertext = vigenere_cipher_russian(plaintext, key)
     print("Зашифрованный текст:", ciphertext)
+    # Расшифровка
+    print("Расшифрованный текст:", vigenere_decrypt_russian(ciphertext, key))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,211 @@
+# vigenere_batch.py
+#
+# Неинтерактивный пакетный взлом шифра Виженера. Каждый шифртекст проходит
+# конвейер Касиски/Фридман -> разбиение на столбцы -> сдвиги ключа ->
+# decrypt_vigenere; шифртексты распределяются по процессам пакетами задач.
+#
+# Примеры:
+#     python vigenere_batch.py intercepts/ --out results.jsonl
+#     python vigenere_batch.py batch.jsonl --workers 8 > results.jsonl
+#     python vigenere_batch.py intercepts/ --profile trace.json    (этапы в одном процессе)
+#
+# Входной JSONL содержит по объекту на строку с полями "id" и "ciphertext".
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from alphabet import RUSSIAN
+from decryptionVigenere import (decrypt_vigenere, indices_to_text, read_ciphertext_indices,
+                                solve_vigenere_key, text_to_indices)
+from instrumentation import add_profile_arguments, profiling
+from keylength import estimate_key_length
+
+# Русский алфавит с буквой 'ё'
+ALPHABET = RUSSIAN
+
+# Элементов в одной задаче исполнителя, если длина пакета неизвестна
+DEFAULT_CHUNKSIZE = 16
+
+# Наибольшее количество ожидающих задач на процесс при потоковой подаче
+PENDING_PER_WORKER = 4
+
+def crack_indices(indices, alphabet=ALPHABET, max_period=40):
+    """
+    Взламывает один шифртекст, заданный массивом индексов алфавита.
+
+    :param indices: Массив индексов алфавита.
+    :param alphabet: Алфавит.
+    :param max_period: Наибольшая проверяемая длина ключа.
+    :return: Словарь с полями key, period, confidence, score, plaintext.
+    """
+    ranking = estimate_key_length(indices, alphabet_size=len(alphabet), max_period=max_period)
+    period, confidence = ranking[0] if ranking else (1, 0.0)
+    key, score = solve_vigenere_key(indices, period, alphabet, top=1)[0]
+    ciphertext = indices_to_text(indices, alphabet)
+    return {
+        'key': key,
+        'period': period,
+        'confidence': confidence,
+        'score': score,
+        'plaintext': decrypt_vigenere(ciphertext, key, alphabet),
+    }
+
+def crack_item(item, alphabet=ALPHABET, max_period=40):
+    """
+    Обрабатывает один элемент пакета в процессе-исполнителе.
+
+    :param item: Пара (идентификатор, источник), где источник — путь к файлу
+                 ('path', ...), сам текст ('text', ...) или сообщение об
+                 ошибке разбора входной записи ('error', ...).
+    :return: Словарь результата с полями id, latency и полями crack_indices
+             либо полем error.
+    """
+    item_id, (kind, source) = item
+    result = {'id': item_id}
+    start = time.perf_counter()
+    try:
+        if kind == 'error':
+            raise ValueError(source)
+        if kind == 'path':
+            indices = read_ciphertext_indices(source, alphabet)
+        else:
+            indices = text_to_indices(source, alphabet)
+        if not len(indices):
+            raise ValueError("Шифртекст не содержит букв алфавита.")
+        result.update(crack_indices(indices, alphabet, max_period))
+        result['letters'] = len(indices)
+    except (OSError, ValueError) as e:
+        result['error'] = str(e)
+        result['letters'] = 0
+    result['latency'] = time.perf_counter() - start
+    return result
+
+def _crack_chunk(args):
+    chunk, alphabet, max_period = args
+    return [crack_item(item, alphabet, max_period) for item in chunk]
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def iter_items(source):
+    """
+    Перечисляет шифртексты из каталога (по файлу на шифртекст) или JSONL.
+    Строки JSONL, которые не удалось разобрать или в которых нет поля
+    ciphertext, перечисляются как элементы ('error', сообщение) и дают
+    запись результата с полем error, не останавливая пакет.
+
+    :param source: Путь к каталогу или к файлу JSONL.
+    :return: Генератор пар (идентификатор, ('path' | 'text' | 'error', значение)).
+    """
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.isfile(path):
+                yield name, ('path', path)
+        return
+
+    with open(source, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            item_id = str(line_number)
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise TypeError("запись должна быть объектом JSON")
+                item_id = str(record.get('id', line_number))
+                ciphertext = record['ciphertext']
+                if not isinstance(ciphertext, str):
+                    raise TypeError("поле ciphertext должно быть строкой")
+            except (ValueError, KeyError, TypeError) as e:
+                message = f"отсутствует поле {e}" if isinstance(e, KeyError) else str(e)
+                yield item_id, ('error', f"Строка {line_number}: {message}")
+                continue
+            yield item_id, ('text', ciphertext)
+
+def crack_batch(items, workers=None, chunksize=None, alphabet=ALPHABET, max_period=40):
+    """
+    Параллельно взламывает пакет шифртекстов. Элементы читаются из items
+    по мере обработки: в пуле одновременно находится не больше
+    PENDING_PER_WORKER задач на процесс.
+
+    :param items: Итерируемый набор элементов из iter_items.
+    :param workers: Количество процессов (по умолчанию — число ядер).
+    :param chunksize: Количество элементов в одной задаче исполнителя
+                      (по умолчанию для списка — около четырех задач на
+                      процесс, иначе DEFAULT_CHUNKSIZE).
+    :return: Генератор результатов в порядке входных элементов.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for item in items:
+            yield crack_item(item, alphabet, max_period)
+        return
+    if chunksize is None:
+        chunksize = max(1, len(items) // (workers * 4)) if hasattr(items, '__len__') else DEFAULT_CHUNKSIZE
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in _chunks(items, chunksize):
+            pending.append(executor.submit(_crack_chunk, (chunk, alphabet, max_period)))
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def summarize(results, elapsed):
+    """
+    Формирует отчет о задержках и пропускной способности пакета.
+    """
+    latencies = sorted(result['latency'] for result in results)
+    letters = sum(result['letters'] for result in results)
+    errors = sum('error' in result for result in results)
+    if not latencies:
+        return "Пакет пуст."
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    return (
+        f"Шифртекстов: {len(latencies)} (ошибок: {errors}), время: {elapsed:.2f} с\n"
+        f"Пропускная способность: {len(latencies) / elapsed:.1f} шифртекстов/с, "
+        f"{letters / elapsed / 1e6:.2f} млн букв/с\n"
+        f"Задержка на шифртекст: среднее {statistics.mean(latencies) * 1e3:.1f} мс, "
+        f"медиана {statistics.median(latencies) * 1e3:.1f} мс, "
+        f"p95 {p95 * 1e3:.1f} мс, максимум {latencies[-1] * 1e3:.1f} мс"
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетный взлом шифра Виженера")
+    parser.add_argument('source', help="Каталог с шифртекстами или файл JSONL")
+    parser.add_argument('--out', default='-', help="Файл результатов JSONL (по умолчанию stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="Количество процессов")
+    parser.add_argument('--chunksize', type=int, default=None, help="Элементов в одной задаче")
+    parser.add_argument('--max-period', type=int, default=40, help="Наибольшая длина ключа")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+    # Этапы учитываются только в текущем процессе
+    workers = 1 if args.profile is not None else args.workers
+
+    items = iter_items(args.source)
+    output = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    results = []
+    start = time.perf_counter()
+    try:
+        with profiling(args.profile, args.profile_allocations):
+            for result in crack_batch(items, workers, args.chunksize, max_period=args.max_period):
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                results.append({key: result[key] for key in ('latency', 'letters', 'error') if key in result})
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(summarize(results, time.perf_counter() - start), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())